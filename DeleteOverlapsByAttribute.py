@@ -1,20 +1,65 @@
 '''
-This script will identify overlapping areas within a feature class, and keep the overlapping area for a single feature 
+This script will identify overlapping areas within a feature class, and keep the overlapping area for a single feature
 based on the attribute of a field.  For example, if you have a polygon Zone 1 and a polygon Zone 2 that overlap, the overlapping
 portion of Zone 2 will be deleted.
 
 Make a copy before using, since this will permanently modify the input data.
 
+Methods
+    Loop - the original method. One selection and set of cursors per overlap. Slow on large layers, but uses very little memory.
+    Bulk - reads the Count Overlapping table once, ranks every overlap in memory, merges all the keeper shapes that beat
+           each losing polygon, and clips/writes each losing polygon once in a single UpdateCursor pass.
+           The resolver functions only need rows and geometry objects with .difference()/.union(), so they can be
+           benchmarked without ArcGIS by feeding them plain tuples and shapely geometries.
+    Overlay - skips Count Overlapping entirely. Uses shapely (STRtree + a single planar overlay of the overlapping
+           polygons) to split the overlaps into faces, gives each face to the best ranked polygon that covers it,
+           and rebuilds each polygon from the faces it won. Requires shapely 2.0+, and can be tested without ArcGIS
+           using synthetic shapely polygons.
+    Parallel - same result as Bulk, but splits the overlaps into independent clusters (connected components of the overlap
+           graph) and clips each cluster in a process pool, with a single UpdateCursor writing the results. Requires
+           shapely in the workers. Must be run as a script (e.g. propy DeleteOverlapsByAttribute.py), not pasted into
+           the Python window, so the worker processes can import it.
+
+Incremental re-runs
+    Set indexFile to keep a sidecar JSON index of a geometry/rank fingerprint and bounding box for each polygon. On the next
+    run only polygons that were added or changed since the last run, plus the polygons whose saved bounding boxes touch
+    them, are resolved (with any of the methods above). Everything else was already resolved by the previous run.
+
+Precision mode
+    Set gridSize to snap the polygons to a grid (in the layer's units) and run the unions/differences in fixed precision,
+    and/or minSliverArea to drop any clipped part smaller than that area. This stops slivers and near-duplicate vertices
+    from piling up run after run. Works with the Bulk, Parallel and Overlay methods and requires shapely. With gridSize
+    set, the winning polygons are snapped and written too, so they line up exactly with the clipped ones. Bulk and Parallel
+    use the overlay for this (keepers and losers have to be noded together), so they give the same result as Overlay.
+    Vertex totals for the written polygons are printed before and after, in any mode.
+
 '''
 
-import arcpy
 import os
+import sys
+import json
+import hashlib
+import multiprocessing
+from collections import defaultdict
+from functools import reduce
+
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+try:
+    import numpy as np
+    import shapely
+    from shapely.strtree import STRtree
+except ImportError:
+    #only needed for the Overlay and Parallel methods, and precision mode
+    shapely = None
 
 ## Set Inputs
 # the name of the field that tells you which polygon to keep
 dataField = 'Zone'
 
-# determine the sorting for this field. 
+# determine the sorting for this field.
 #If sortDescending = True,  the polygon with the highest value will be retained (all others clipped)
 #If sortDescending = False, the polygon with the lowest  value will be retained (all others clipped)
 sortDescending = False
@@ -22,42 +67,466 @@ sortDescending = False
 # the name or path to your polygon FC
 polygons = 'polygonLayerName'
 
-# Output FC and table to use with Count Overlapping. These get deleted at the end.
-overlapFC = os.path.join(arcpy.env.scratchGDB,'overlapFC')
-overlapTable = os.path.join(arcpy.env.scratchGDB,'overlapTable')
+# how to resolve the overlaps, 'Bulk', 'Parallel', 'Overlay' or 'Loop' (see notes above)
+method = 'Bulk'
 
-## Run Script
-# Set minimum overlap count to 2
-arcpy.analysis.CountOverlappingFeatures(polygons, overlapFC, 2, overlapTable)
-
-# Get list of OIDs for overlapFC and loop through them
-overlaps = [row[0] for row in arcpy.da.SearchCursor(overlapFC, "OBJECTID")]
-
-for overlap in overlaps:
-    # Get the list of polygon OIDs for that overlap
-    polys = [row[0] for row in arcpy.da.SearchCursor(overlapTable, "ORIG_OID",where_clause = 'OVERLAP_OID = '+str(overlap))]
-    
-    # Select them
-    arcpy.management.SelectLayerByAttribute(polygons, 'NEW_SELECTION', "OBJECTID IN ({:s})".format(','.join(f"{x}" for x in polys)))
-    
-    # Extract data from selection as lists of OID and dataField
-    rankOID  = [row[0] for row in arcpy.da.SearchCursor(polygons,"OBJECTID")]   
-    rankData = [row[0] for row in arcpy.da.SearchCursor(polygons, dataField)]
-    
-    # Sort OIDs based on ascending values of dataField (so the first OID is the most lowest/first value in Datafield)
-    clipOIDs = [x for _, x in sorted(zip(rankData, rankOID),reverse=sortDescending)]
-    
-    # Keep the desired OID, the remaining list will all be clipped
+# number of worker processes for the Parallel method (None uses every core)
+processes = None
+
+# sidecar index for incremental re-runs (see notes above). Leave blank to always process the whole layer.
+indexFile = ''
+
+# precision mode (see notes above). Grid size and sliver area are in the layer's units. None/0 turns them off.
+gridSize = None
+minSliverArea = 0
+
+
+## Functions
+def group_overlaps(rows):
+    """Group (OVERLAP_OID, ORIG_OID) rows into {OVERLAP_OID: [ORIG_OID, ...]}, ordered by OVERLAP_OID"""
+    groups = defaultdict(list)
+    for overlapOID, origOID in rows:
+        groups[overlapOID].append(origOID)
+    return {k: groups[k] for k in sorted(groups)}
+
+
+def rank_overlap(oids, ranks, descending=False):
+    """Returns (keepOID, clipOIDs) for the polygons in one overlap, using the same sort as the Loop method"""
+    clipOIDs = [x for _, x in sorted(((ranks[oid], oid) for oid in oids), reverse=descending)]
     keepOID = clipOIDs.pop(0)
-    keepShape = [row[0] for row in arcpy.da.SearchCursor(polygons, "SHAPE@",where_clause = 'OBJECTID = '+str(keepOID))][0]
-    
-    # Loop through and clip
-    with arcpy.da.UpdateCursor(polygons,"SHAPE@",where_clause="OBJECTID IN ({:s})".format(','.join(f"{x}" for x in clipOIDs))) as cursor:
+    return keepOID, clipOIDs
+
+
+def find_losers(groups, ranks, descending=False):
+    """Returns {ORIG_OID: set of keeper OIDs that beat it} for every polygon that loses at least one overlap"""
+    losers = defaultdict(set)
+    for oids in groups.values():
+        keepOID, clipOIDs = rank_overlap(oids, ranks, descending)
+        for oid in clipOIDs:
+            losers[oid].add(keepOID)
+    return losers
+
+
+def merge_shapes(shapeList):
+    """Union a list of geometries (arcpy or shapely) into one"""
+    return reduce(lambda a, b: a.union(b), shapeList)
+
+
+def drop_slivers(geom, minArea):
+    """Remove the parts of a shapely (multi)polygon smaller than minArea"""
+    parts = shapely.get_parts(geom)
+    parts = parts[shapely.area(parts) >= minArea]
+    if len(parts) == 0:
+        return shapely.Polygon()
+    return parts[0] if len(parts) == 1 else shapely.multipolygons(parts)
+
+
+def vertex_count(shapes):
+    """Total vertices in a list of arcpy or shapely geometries"""
+    return sum(g.pointCount if hasattr(g, 'pointCount') else int(shapely.get_num_coordinates(g))
+               for g in shapes if g is not None)
+
+
+def resolve_overlaps(groups, ranks, shapes, descending=False, gridSize=None, minSliverArea=0):
+    """Clip every losing polygon once, against the union of every keeper that beats it.
+
+    groups - {OVERLAP_OID: [ORIG_OID, ...]}
+    ranks  - {ORIG_OID: dataField value}
+    shapes - {ORIG_OID: geometry}
+    gridSize, minSliverArea - precision mode, shapely geometries only
+    Returns {ORIG_OID: clipped geometry} for the losing polygons only (plus any polygon that moved when snapped
+    to gridSize).
+
+    With gridSize set the polygons are rebuilt from one snapped overlay (overlay_resolve). Snap rounding each loser
+    against its keepers would add nodes the keepers never get, leaving overlaps of about gridSize squared.
+
+    Keeper shapes are always the original (unclipped) shapes. Since the ranking is a total order, a loser
+    gives up all of its overlap with any polygon that beats it, so the result does not depend on the order
+    the overlaps are processed in.
+    """
+    if gridSize:
+        oids   = list(shapes)
+        result = overlay_resolve(oids, ranks, [shapes[oid] for oid in oids], descending, gridSize, minSliverArea)
+        # polygons the overlay didn't rebuild are still written if snapping moved them
+        for oid in oids:
+            if oid not in result:
+                snapped = shapely.set_precision(shapes[oid], gridSize)
+                if not shapely.equals_exact(shapely.normalize(snapped), shapely.normalize(shapes[oid]), 0):
+                    result[oid] = snapped
+        return result
+
+    result = {}
+    for oid, keepers in find_losers(groups, ranks, descending).items():
+        newShape = shapes[oid].difference(merge_shapes([shapes[k] for k in keepers]))
+        if minSliverArea:
+            newShape = drop_slivers(newShape, minSliverArea)
+        result[oid] = newShape
+    return result
+
+
+def overlap_components(groups):
+    """Split {OVERLAP_OID: [ORIG_OID, ...]} into independent clusters.
+
+    Polygons are the nodes and overlaps are the edges of the overlap graph. Returns a list of group dicts,
+    one per connected component, that can each be resolved on their own.
+    """
+    parent = {}
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for oids in groups.values():
+        root = find(oids[0])
+        for oid in oids[1:]:
+            other = find(oid)
+            if other != root:
+                parent[other] = root
+
+    components = defaultdict(dict)
+    for overlapOID, oids in groups.items():
+        components[find(oids[0])][overlapOID] = oids
+    return list(components.values())
+
+
+def resolve_component(task):
+    """Worker for the Parallel method. Takes (groups, ranks, {OID: WKB}, descending, gridSize, minSliverArea)
+    for one cluster and returns ({OID: WKB} for the clipped polygons, vertices before, vertices after)."""
+    groups, ranks, wkbs, descending, gridSize, minSliverArea = task
+    shapes  = {oid: shapely.from_wkb(wkb) for oid, wkb in wkbs.items()}
+    clipped = resolve_overlaps(groups, ranks, shapes, descending, gridSize, minSliverArea)
+    return ({oid: shapely.to_wkb(g) for oid, g in clipped.items()},
+            vertex_count(shapes[oid] for oid in clipped), vertex_count(clipped.values()))
+
+
+def overlay_resolve(oids, ranks, geoms, descending=False, gridSize=None, minSliverArea=0):
+    """Resolve all overlaps with one planar overlay instead of pairwise differences.
+
+    oids  - list of polygon OIDs
+    ranks - {OID: dataField value}
+    geoms - shapely polygons, in the same order as oids
+    gridSize, minSliverArea - precision mode
+    Returns {OID: rebuilt geometry} for the polygons that lost area (empty geometry if they lost all of it).
+    With gridSize set, every overlapping polygon is rebuilt from the snapped faces and returned.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    if gridSize:
+        geoms = shapely.set_precision(geoms, gridSize)
+    tree  = STRtree(geoms)
+
+    # Find the pairs that share area (intersecting, but not just touching). Only those polygons go in the overlay.
+    left, right = tree.query(geoms, predicate='intersects')
+    keep = left < right
+    left, right = left[keep], right[keep]
+    keep = ~shapely.touches(geoms[left], geoms[right])
+    involved = np.unique(np.concatenate([left[keep], right[keep]]))
+    if involved.size == 0:
+        return {}
+
+    # Node every boundary together and polygonize, giving the planar overlay faces
+    sub = geoms[involved]
+    linework = shapely.union_all(shapely.boundary(sub), grid_size=gridSize)
+    faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(linework)))
+
+    # Find the parents of each face using an interior point, and give the face to the best ranked parent.
+    # Faces with no parent are holes in the input and are dropped.
+    faceIdx, parentIdx = STRtree(sub).query(shapely.point_on_surface(faces), predicate='within')
+    rankKey = lambda i: (ranks[oids[involved[i]]], oids[involved[i]])
+    winner = {}
+    for f, i in zip(faceIdx, parentIdx):
+        if f not in winner:
+            winner[f] = i
+        elif (rankKey(i) > rankKey(winner[f])) == descending:
+            winner[f] = i
+
+    # Rebuild each parent that lost a face from the faces it won
+    won  = defaultdict(list)
+    lost = set()
+    for f, i in zip(faceIdx, parentIdx):
+        if winner[f] == i:
+            won[i].append(faces[f])
+        else:
+            lost.add(i)
+    result = {}
+    for i in (lost | set(won)) if gridSize else lost:
+        newShape = shapely.union_all(won[i], grid_size=gridSize) if i in won else shapely.Polygon()
+        # noding leaves extra vertices along the edges shared with other parents, drop the collinear ones
+        newShape = shapely.simplify(newShape, 0)
+        if minSliverArea:
+            newShape = drop_slivers(newShape, minSliverArea)
+        result[oids[involved[i]]] = newShape
+    return result
+
+
+def fingerprint(wkb, rank):
+    """Hash of a polygon's geometry and ranking value, so either changing flags it for the next run"""
+    return hashlib.sha1(bytes(wkb) + repr(rank).encode()).hexdigest()
+
+
+def boxes_intersect(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def find_neighbours(boxes, queryBoxes):
+    """Returns the OIDs in {OID: (xmin, ymin, xmax, ymax)} whose box intersects any of the query boxes.
+
+    Uses a simple grid (cell size from the average box size) so a few hundred queries don't scan every box.
+    """
+    if not boxes or not queryBoxes:
+        return set()
+    cell = max(sum(max(b[2]-b[0], b[3]-b[1]) for b in boxes.values()) / len(boxes), 1e-9)
+    def cells(b):
+        for i in range(int(b[0] // cell), int(b[2] // cell) + 1):
+            for j in range(int(b[1] // cell), int(b[3] // cell) + 1):
+                yield i, j
+
+    grid = defaultdict(list)
+    for oid, b in boxes.items():
+        for c in cells(b):
+            grid[c].append(oid)
+
+    found = set()
+    for q in queryBoxes:
+        for c in cells(q):
+            for oid in grid.get(c, ()):
+                if oid not in found and boxes_intersect(boxes[oid], q):
+                    found.add(oid)
+    return found
+
+
+def incremental_candidates(saved, current):
+    """Compare two {OID: (fingerprint, xmin, ymin, xmax, ymax)} indexes.
+
+    Returns the OIDs that need to be resolved again: polygons that are new or changed, plus any polygon whose
+    saved box touches a changed polygon (old or new box) or a deleted one.
+    """
+    changed = {oid for oid, f in current.items() if oid not in saved or saved[oid][0] != f[0]}
+    removed = set(saved) - set(current)
+    queryBoxes = [tuple(current[oid][1:]) for oid in changed]
+    queryBoxes += [tuple(saved[oid][1:]) for oid in (changed | removed) if oid in saved]
+    savedBoxes = {oid: tuple(f[1:]) for oid, f in saved.items() if oid in current}
+    return changed | find_neighbours(savedBoxes, queryBoxes)
+
+
+def read_index(polygons):
+    """Fingerprint and bounding box for every polygon, in one cursor pass"""
+    index = {}
+    with arcpy.da.SearchCursor(polygons, ['OID@', dataField, 'SHAPE@']) as cursor:
+        for oid, val, shape in cursor:
+            if shape:
+                ext = shape.extent
+                index[oid] = (fingerprint(shape.WKB, val), ext.XMin, ext.YMin, ext.XMax, ext.YMax)
+    return index
+
+
+def load_index(path):
+    """Load a saved index, or None if it is missing or was made with different settings"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        saved = json.load(f)
+    if [saved.get('polygons'), saved.get('dataField'), saved.get('sortDescending')] != [polygons, dataField, sortDescending]:
+        return None
+    return {int(oid): tuple(f) for oid, f in saved['features'].items()}
+
+
+def save_index(path, index):
+    with open(path, 'w') as f:
+        json.dump({'polygons': polygons, 'dataField': dataField, 'sortDescending': sortDescending,
+                   'features': {str(oid): list(f) for oid, f in index.items()}}, f)
+
+
+def run_loop(polygons, overlapFC, overlapTable):
+    """Original method, one round trip to the data per overlap"""
+    # Get list of OIDs for overlapFC and loop through them
+    overlaps = [row[0] for row in arcpy.da.SearchCursor(overlapFC, "OBJECTID")]
+
+    for overlap in overlaps:
+        # Get the list of polygon OIDs for that overlap
+        polys = [row[0] for row in arcpy.da.SearchCursor(overlapTable, "ORIG_OID",where_clause = 'OVERLAP_OID = '+str(overlap))]
+
+        # Select them
+        arcpy.management.SelectLayerByAttribute(polygons, 'NEW_SELECTION', "OBJECTID IN ({:s})".format(','.join(f"{x}" for x in polys)))
+
+        # Extract data from selection as lists of OID and dataField
+        rankOID  = [row[0] for row in arcpy.da.SearchCursor(polygons,"OBJECTID")]
+        rankData = [row[0] for row in arcpy.da.SearchCursor(polygons, dataField)]
+
+        # Sort OIDs based on ascending values of dataField (so the first OID is the most lowest/first value in Datafield)
+        clipOIDs = [x for _, x in sorted(zip(rankData, rankOID),reverse=sortDescending)]
+
+        # Keep the desired OID, the remaining list will all be clipped
+        keepOID = clipOIDs.pop(0)
+        keepShape = [row[0] for row in arcpy.da.SearchCursor(polygons, "SHAPE@",where_clause = 'OBJECTID = '+str(keepOID))][0]
+
+        # Loop through and clip
+        with arcpy.da.UpdateCursor(polygons,"SHAPE@",where_clause="OBJECTID IN ({:s})".format(','.join(f"{x}" for x in clipOIDs))) as cursor:
+            for row in cursor:
+                oldShape=row[0]
+                newShape=oldShape.difference(keepShape)
+                cursor.updateRow((newShape,))
+
+
+def run_bulk(polygons, overlapTable):
+    """Read everything once, resolve in memory, and write back in a single UpdateCursor pass"""
+    # Read the whole overlap table once
+    with arcpy.da.SearchCursor(overlapTable, ['OVERLAP_OID','ORIG_OID']) as cursor:
+        groups = group_overlaps(cursor)
+    involved = {oid for oids in groups.values() for oid in oids}
+    print('{} overlaps between {} polygons'.format(len(groups), len(involved)))
+
+    # Read the ranking field and shapes for every involved polygon in one cursor.
+    # Precision mode needs shapely geometries, so read WKB instead
+    precise = gridSize or minSliverArea
+    ranks  = {}
+    shapes = {}
+    with arcpy.da.SearchCursor(polygons, ['OID@', dataField, 'SHAPE@WKB' if precise else 'SHAPE@']) as cursor:
+        for oid, val, shape in cursor:
+            if oid in involved:
+                ranks[oid]  = val
+                shapes[oid] = shapely.from_wkb(bytes(shape)) if precise else shape
+
+    clipped = resolve_overlaps(groups, ranks, shapes, sortDescending, gridSize, minSliverArea)
+    report_vertices(vertex_count(shapes[oid] for oid in clipped), vertex_count(clipped.values()))
+    if precise:
+        clipped = to_arcpy(clipped, arcpy.Describe(polygons).spatialReference)
+    write_shapes(polygons, clipped)
+
+
+def report_vertices(before, after):
+    print('Vertices in written polygons: {} before, {} after'.format(before, after))
+
+
+def to_arcpy(geoms, sr):
+    """Convert {OID: shapely geometry} to arcpy geometry. Empty results become null shapes, like an empty difference would"""
+    return {oid: None if g.is_empty else arcpy.FromWKB(bytearray(shapely.to_wkb(g)), sr) for oid, g in geoms.items()}
+
+
+def run_parallel(polygons, overlapTable, processes=None):
+    """Bulk method, with each cluster of overlaps clipped in a separate process"""
+    if shapely is None:
+        raise ImportError('The Parallel method requires shapely 2.0 or newer')
+    with arcpy.da.SearchCursor(overlapTable, ['OVERLAP_OID','ORIG_OID']) as cursor:
+        groups = group_overlaps(cursor)
+    components = overlap_components(groups)
+    involved = {oid for oids in groups.values() for oid in oids}
+    print('{} overlaps between {} polygons in {} clusters'.format(len(groups), len(involved), len(components)))
+
+    ranks = {}
+    wkbs  = {}
+    with arcpy.da.SearchCursor(polygons, ['OID@', dataField, 'SHAPE@WKB']) as cursor:
+        for oid, val, wkb in cursor:
+            if oid in involved:
+                ranks[oid] = val
+                wkbs[oid]  = bytes(wkb)
+
+    tasks = []
+    for comp in components:
+        oids = {oid for grp in comp.values() for oid in grp}
+        tasks.append((comp, {oid: ranks[oid] for oid in oids}, {oid: wkbs[oid] for oid in oids},
+                      sortDescending, gridSize, minSliverArea))
+
+    # ArcGIS Pro's sys.executable is ArcGISPro.exe, point the workers at the python in the same environment
+    if os.path.basename(sys.executable).lower().startswith('arcgispro'):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe'))
+
+    # Workers return WKB, the main process is the only writer
+    sr = arcpy.Describe(polygons).spatialReference
+    clipped = {}
+    before = after = 0
+    with multiprocessing.Pool(processes) as pool:
+        chunksize = max(1, len(tasks) // (4 * (processes or os.cpu_count() or 1)))
+        for result, b, a in pool.imap_unordered(resolve_component, tasks, chunksize):
+            before += b
+            after  += a
+            for oid, wkb in result.items():
+                clipped[oid] = shapely.from_wkb(wkb)
+    report_vertices(before, after)
+    write_shapes(polygons, to_arcpy(clipped, sr))
+
+
+def run_overlay(polygons):
+    """Resolve with the shapely overlay engine, no Count Overlapping needed"""
+    if shapely is None:
+        raise ImportError('The Overlay method requires shapely 2.0 or newer')
+    oids  = []
+    ranks = {}
+    wkbs  = []
+    with arcpy.da.SearchCursor(polygons, ['OID@', dataField, 'SHAPE@WKB']) as cursor:
+        for oid, val, wkb in cursor:
+            if wkb:
+                oids.append(oid)
+                ranks[oid] = val
+                wkbs.append(bytes(wkb))
+    print('Running overlay on {} polygons'.format(len(oids)))
+
+    geoms = shapely.from_wkb(wkbs)
+    resolved = overlay_resolve(oids, ranks, geoms, sortDescending, gridSize, minSliverArea)
+    inputs = dict(zip(oids, geoms))
+    report_vertices(vertex_count(inputs[oid] for oid in resolved), vertex_count(resolved.values()))
+
+    write_shapes(polygons, to_arcpy(resolved, arcpy.Describe(polygons).spatialReference))
+
+
+def write_shapes(polygons, clipped):
+    """Write {OID: geometry} back to the polygons in one UpdateCursor pass (one updateRow per polygon)"""
+    print('Writing {} clipped polygons'.format(len(clipped)))
+    with arcpy.da.UpdateCursor(polygons, ['OID@','SHAPE@']) as cursor:
         for row in cursor:
-            oldShape=row[0]
-            newShape=oldShape.difference(keepShape)
-            cursor.updateRow((newShape,))
+            if row[0] in clipped:
+                cursor.updateRow((row[0], clipped[row[0]]))
+
+
+## Run Script
+def run(polygons):
+    if (gridSize or minSliverArea) and (method == 'Loop' or shapely is None):
+        raise ValueError('Precision mode needs shapely and the Bulk, Parallel or Overlay method')
+    if method == 'Overlay':
+        run_overlay(polygons)
+    else:
+        # Output FC and table to use with Count Overlapping. These get deleted at the end.
+        overlapFC = os.path.join(arcpy.env.scratchGDB,'overlapFC')
+        overlapTable = os.path.join(arcpy.env.scratchGDB,'overlapTable')
+
+        # Set minimum overlap count to 2
+        arcpy.analysis.CountOverlappingFeatures(polygons, overlapFC, 2, overlapTable)
+
+        if method == 'Loop':
+            run_loop(polygons, overlapFC, overlapTable)
+        elif method == 'Parallel':
+            run_parallel(polygons, overlapTable, processes)
+        else:
+            run_bulk(polygons, overlapTable)
+
+        # Delete intermediate overlap layers
+        arcpy.management.Delete(overlapFC)
+        arcpy.management.Delete(overlapTable)
+
 
-# Delete intermediate overlap layers
-arcpy.management.Delete(overlapFC)
-arcpy.management.Delete(overlapTable)
+if __name__ == '__main__':
+    if not indexFile:
+        run(polygons)
+    else:
+        saved = load_index(indexFile)
+        if saved is None:
+            print('No usable index found, processing the whole layer')
+            run(polygons)
+            # index the resolved shapes
+            save_index(indexFile, read_index(polygons))
+        else:
+            current = read_index(polygons)
+            candidates = incremental_candidates(saved, current)
+            print('{} of {} polygons changed or neighbour a change'.format(len(candidates), len(current)))
+            if candidates:
+                oidField = arcpy.Describe(polygons).OIDFieldName
+                subset = arcpy.management.MakeFeatureLayer(polygons, 'overlapCandidates',
+                            "{} IN ({:s})".format(oidField, ','.join(f"{x}" for x in sorted(candidates))))[0]
+                run(subset)
+                # only the candidates can have been rewritten, refresh just their entries
+                # (ones clipped away entirely have no shape any more and drop out)
+                for oid in candidates:
+                    current.pop(oid, None)
+                current.update(read_index(subset))
+                arcpy.management.Delete(subset)
+            save_index(indexFile, current)
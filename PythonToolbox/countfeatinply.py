@@ -4,15 +4,233 @@ Sum (Count) features in zone by type and add results to input polygon
 Version History
     1.0 (10/11/21)       Created JT
     2.0 (01/19/22)       Reworked to allow use to define summary field names, and optional new output
+    2.1 (10/17/26)       Summary table pivoted once (zone OID x feature value) and written in one UpdateCursor pass
+    2.2 (10/17/26)       Zones grouped in one cursor pass over (OID, zone field), Describe results cached
+    2.3 (10/17/26)       Native engine option: zones in a shapely STRtree, features counted in process (no scratch
+                         SummarizeWithin tables). Lines/polygons count when their clipped length/area is positive.
+    2.4 (10/17/26)       Output fields can be the count, sum, mean, min or max of a numeric feature field, all
+                         computed in the same grouped pass. Statistic fields are DOUBLE, counts stay LONG. MEAN needs the
+                         Native engine.
+    2.5 (10/17/26)       Native engine can split the features into a grid of tiles counted in a process pool, with
+                         the per-zone partial results merged before the single write-back.
 
 """
 
-import arcpy
 import os
-from arcpy import env
-from arcpy.sa import *
+try:
+    import arcpy
+    from arcpy import env
+    from arcpy.sa import *
+except ImportError:
+    arcpy = None
 import pandas as pd
 import numpy as np
+from parallel import process_pool
+try:
+    import shapely
+    from shapely.strtree import STRtree
+except ImportError:
+    #only needed for the Native engine
+    shapely = None
+
+
+#last Describe result, for validation only. Describe is slow and validation asks for the same dataset repeatedly,
+#execute always describes fresh since the dataset behind a name can change between runs
+_describe = {'dataset': None, 'desc': None}
+
+
+def describe(dataset):
+    if _describe['dataset'] != dataset:
+        _describe['desc'] = arcpy.Describe(dataset)
+        _describe['dataset'] = dataset
+    return _describe['desc']
+
+
+#statistics an output field can hold
+STATISTICS = ['COUNT', 'SUM', 'MEAN', 'MIN', 'MAX']
+
+
+def stat_columns(statfields):
+    """Columns of the partial aggregates for each (zone OID, feature value) and how they combine: Count, and
+    SUM_/N_/MIN_/MAX_ for each statistic field (MEAN is SUM_/N_ once they are combined)"""
+    cols = {'Count': 'sum'}
+    for f in statfields:
+        cols.update({'SUM_'+f: 'sum', 'N_'+f: 'sum', 'MIN_'+f: 'min', 'MAX_'+f: 'max'})
+    return cols
+
+
+def combine_partials(grouped, statfields):
+    """Aggregate a groupby of partial aggregate tables. SUM_ stays null when none of the parts has a value
+    (min_count=1), like MIN_/MAX_, instead of summing to 0"""
+    cols = stat_columns(statfields)
+    sums = [c for c in cols if c.startswith('SUM_')]
+    out  = grouped.agg({c: how for c, how in cols.items() if c not in sums})
+    if sums:
+        out[sums] = grouped[sums].sum(min_count=1)
+    return out[list(cols)]
+
+
+def summarize_within_table(df, typefield, statfields):
+    """Partial aggregates from the SummarizeWithin group table (statistic columns read with NaN for nulls). The
+    count is the last column that isn't one of the SUM/MIN/MAX statistics. The group table has no count of non-null
+    values, so N_ is left empty and MEAN can't be combined over zones (validation only allows it with Native)."""
+    lower = {c.lower(): c for c in df.columns}
+    statcols = {st+'_'+f: lower[(st+'_'+f).lower()] for f in statfields for st in ('SUM', 'MIN', 'MAX')}
+    countcol = [c for c in df.columns if c not in statcols.values()][-1]
+    out = pd.DataFrame({'Join_ID': df['Join_ID'], typefield: df[typefield], 'Count': df[countcol]})
+    for f in statfields:
+        out['SUM_'+f] = df[statcols['SUM_'+f]]
+        out['N_'+f]   = np.nan
+        out['MIN_'+f] = df[statcols['MIN_'+f]]
+        out['MAX_'+f] = df[statcols['MAX_'+f]]
+    return out
+
+
+def zone_stats(df, typefield, specs, oid_zone):
+    """Combine the partial aggregates over the zones sharing a zone value, in one groupby. specs are
+    (feature value, statistic, statistic field) for each output field. Returns {OID: [value for each spec]},
+    counts are 0 and other statistics None where a zone has no features of that value."""
+    #number the zone values (nulls are a zone value too)
+    zone = pd.Series(pd.factorize(pd.Series(oid_zone, dtype=object), use_na_sentinel=False)[0], index=list(oid_zone))
+    statfields = sorted({f for val, st, f in specs if st != 'COUNT'})
+    grouped = combine_partials(df.groupby([zone.reindex(df['Join_ID']).values, df[typefield].values]), statfields)
+    columns = []
+    for val, st, f in specs:
+        if st == 'COUNT':
+            col = grouped['Count']
+        elif st == 'MEAN':
+            col = grouped['SUM_'+f] / grouped['N_'+f].where(grouped['N_'+f] > 0)
+        else:
+            col = grouped[st+'_'+f]
+        #this feature value, by zone value
+        col = col[col.index.get_level_values(1) == val]
+        columns.append(pd.Series(col.values, index=col.index.get_level_values(0)))
+    #back out to every OID of the zone
+    table = pd.concat(columns, axis=1).reindex(zone.values).values.tolist() if specs else [[] for z in zone]
+    iscount = [st == 'COUNT' for val, st, f in specs]
+    return {oid: [(int(x) if x == x else 0) if c else (float(x) if x == x else None) for x, c in zip(row, iscount)]
+            for oid, row in zip(zone.index, table)}
+
+
+def native_summary(zones, zoneids, feats, feattypes, typefield, stats=None):
+    """Count features in zones without SummarizeWithin. zones/zoneids are the zone polygons (shapely) and their
+    OIDs, feats/feattypes the features and their type values as strings, stats {field: values (nan for null)} for
+    the statistic fields. Points count in every zone they intersect, lines and polygons in every zone where their
+    clipped length/area is positive. Returns the partial aggregates for each (Join_ID, type) (see stat_columns)."""
+    zones   = np.asarray(zones, dtype=object)
+    zoneids = np.asarray(zoneids)
+    feats   = np.asarray(feats, dtype=object)
+    fi, zi  = STRtree(zones).query(feats, predicate='intersects')
+    #drop lines/polygons that only touch the zone
+    dim = shapely.get_dimensions(feats[fi])
+    clip = dim > 0
+    if clip.any():
+        parts = shapely.intersection(feats[fi[clip]], zones[zi[clip]])
+        measure = np.where(dim[clip] == 1, shapely.length(parts), shapely.area(parts))
+        keep = np.ones(len(fi), dtype=bool)
+        keep[clip] = measure > 0
+        fi, zi = fi[keep], zi[keep]
+    #aggregate each (zone, type) pair
+    typenames, typecodes = np.unique(np.asarray(feattypes, dtype=str), return_inverse=True)
+    pairs, inverse, counts = np.unique(np.column_stack([zi, typecodes[fi]]).reshape(-1, 2), axis=0,
+                                       return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    out = pd.DataFrame({'Join_ID': zoneids[pairs[:, 0]], typefield: typenames[pairs[:, 1]], 'Count': counts})
+    for f, vals in (stats or {}).items():
+        vals = np.asarray(vals, dtype=float)[fi]
+        ok = ~np.isnan(vals)
+        n = np.bincount(inverse[ok], minlength=len(pairs))
+        lo = np.full(len(pairs), np.inf)
+        hi = np.full(len(pairs), -np.inf)
+        np.minimum.at(lo, inverse[ok], vals[ok])
+        np.maximum.at(hi, inverse[ok], vals[ok])
+        out['SUM_'+f] = np.where(n > 0, np.bincount(inverse[ok], weights=vals[ok], minlength=len(pairs)), np.nan)
+        out['N_'+f]   = n
+        out['MIN_'+f] = np.where(n > 0, lo, np.nan)
+        out['MAX_'+f] = np.where(n > 0, hi, np.nan)
+    return out
+
+
+def merge_partials(parts, typefield, statfields):
+    """Combine partial aggregate tables (from separate tiles) into one row for each (Join_ID, type)"""
+    df = pd.concat(parts, ignore_index=True)
+    return combine_partials(df.groupby(['Join_ID', typefield]), statfields).reset_index()
+
+
+def tile_tasks(zones, zoneids, feats, feattypes, stats, tiles):
+    """Split the features into a tiles x tiles grid over their extent. Each feature belongs to the tile holding its
+    bounding box's lower left corner, so it is counted once. A tile takes every zone whose bounding box touches the
+    bounding box of the tile's features, so zones crossing tile edges are in each tile they need to be.
+    Returns (zone WKB, zone OIDs, feature WKB, feature types, stats) for each tile with features."""
+    zones   = np.asarray(zones, dtype=object)
+    zoneids = np.asarray(zoneids)
+    feats   = np.asarray(feats, dtype=object)
+    types   = np.asarray(feattypes, dtype=str)
+    bounds  = shapely.bounds(feats)
+    valid   = np.flatnonzero(~np.isnan(bounds[:, 0]))
+    if not len(valid):
+        return []
+    bounds  = bounds[valid]
+    x0, y0  = bounds[:, 0].min(), bounds[:, 1].min()
+    width   = (bounds[:, 0].max() - x0) / tiles or 1
+    height  = (bounds[:, 1].max() - y0) / tiles or 1
+    ix = np.minimum(((bounds[:, 0] - x0) // width).astype(int), tiles - 1)
+    iy = np.minimum(((bounds[:, 1] - y0) // height).astype(int), tiles - 1)
+    tile = ix * tiles + iy
+    tree = STRtree(zones)
+    tasks = []
+    for t in np.unique(tile):
+        members = tile == t
+        b = bounds[members]
+        extent = shapely.box(b[:, 0].min(), b[:, 1].min(), b[:, 2].max(), b[:, 3].max())
+        zi = tree.query(extent)
+        if not len(zi):
+            continue
+        fi = valid[members]
+        tasks.append((shapely.to_wkb(zones[zi]), zoneids[zi], shapely.to_wkb(feats[fi]), types[fi],
+                      {f: np.asarray(v, dtype=float)[fi] for f, v in stats.items()}))
+    return tasks
+
+
+def tile_summary(task, typefield):
+    """Partial aggregates for one tile (run in the worker processes)"""
+    zonewkb, zoneids, featwkb, feattypes, stats = task
+    return native_summary(shapely.from_wkb(zonewkb), zoneids, shapely.from_wkb(featwkb), feattypes, typefield, stats)
+
+
+def tiled_summary(zones, zoneids, feats, feattypes, typefield, stats=None, tiles=4, processes=None):
+    """native_summary over a grid of tiles, counted in a process pool and merged"""
+    stats = stats or {}
+    tasks = tile_tasks(zones, zoneids, feats, feattypes, stats, tiles)
+    if len(tasks) > 1:
+        with process_pool(min(len(tasks), processes or os.cpu_count() or 1)) as pool:
+            parts = pool.starmap(tile_summary, [(task, typefield) for task in tasks])
+    else:
+        parts = [tile_summary(task, typefield) for task in tasks]
+    if not parts:
+        return native_summary([], [], [], [], typefield, stats)
+    return merge_partials(parts, typefield, sorted(stats))
+
+
+def read_native(SumZone, SumFeature, SumFeatureField, statfields=()):
+    """Zone and feature geometries (in the zone's coordinate system), the feature type values as the
+    strings the GPValueTable uses, and the statistic field values, for native_summary"""
+    sr = arcpy.Describe(SumZone).spatialReference
+    zoneids, zones = [], []
+    with arcpy.da.SearchCursor(SumZone, ['OID@', 'SHAPE@WKB']) as cursor:
+        for oid, wkb in cursor:
+            zoneids.append(oid)
+            zones.append(bytes(wkb) if wkb else None)
+    feats, feattypes = [], []
+    stats = {f: [] for f in statfields}
+    with arcpy.da.SearchCursor(SumFeature, ['SHAPE@WKB', SumFeatureField] + list(statfields), spatial_reference=sr) as cursor:
+        for row in cursor:
+            feats.append(bytes(row[0]) if row[0] else None)
+            #nulls are -999, as with TableToNumPyArray
+            feattypes.append('-999' if row[1] is None else str(row[1]))
+            for f, v in zip(statfields, row[2:]):
+                stats[f].append(np.nan if v is None else v)
+    return shapely.from_wkb(zones), zoneids, shapely.from_wkb(feats), feattypes, stats
 
 
 class CountFeaturesInZone(object):
@@ -62,7 +280,8 @@ class CountFeaturesInZone(object):
             parameterType='Required',
             direction='Input',
             category = 'Summary Field Names')
-        fieldnames.columns = [['GPString', 'Feature Field Values'], ['GPString', 'Name of Output Sum Field']]
+        fieldnames.columns = [['GPString', 'Feature Field Values'], ['GPString', 'Name of Output Sum Field'],
+                              ['GPString', 'Statistic'], ['GPString', 'Statistic Field']]
     
     
         makenew = arcpy.Parameter(
@@ -80,6 +299,26 @@ class CountFeaturesInZone(object):
             parameterType="Optional",
             direction="Output",
             enabled=False)
+        
+        engine = arcpy.Parameter(
+            displayName="Counting Engine",
+            name="engine",
+            datatype="GPString",
+            parameterType="Required",
+            direction="Input")
+        engine.filter.type = "ValueList"
+        engine.filter.list = ['Summarize Within', 'Native']
+        engine.value = 'Summarize Within'
+        
+        tiles = arcpy.Parameter(
+            displayName="Tiles per Side (Native engine, counted in parallel)",
+            name="tiles",
+            datatype="GPLong",
+            parameterType="Optional",
+            direction="Input",
+            category="Parallel Processing")
+        tiles.filter.type = "Range"
+        tiles.filter.list = [1, 64]
             
         params =   [sumfeature,         #0
                     sumfeaturefield,    #1
@@ -87,7 +326,9 @@ class CountFeaturesInZone(object):
                     sumzonefield,       #3
                     fieldnames,         #4
                     makenew,            #5
-                    output]             #6          
+                    output,             #6
+                    engine,             #7
+                    tiles]              #8
 
 
         return params            
@@ -112,9 +353,12 @@ class CountFeaturesInZone(object):
             parameters[6].enabled = False
         if not parameters[5].hasBeenValidated and parameters[2].value:
             #use validate and unique to make sure the output fc name is good
-            outname = arcpy.CreateUniqueName(arcpy.ValidateTableName(arcpy.Describe(parameters[2].valueAsText).aliasName,arcpy.env.workspace),arcpy.env.workspace)
+            outname = arcpy.CreateUniqueName(arcpy.ValidateTableName(describe(parameters[2].valueAsText).aliasName,arcpy.env.workspace),arcpy.env.workspace)
             parameters[6].value = outname
             
+        #tiling only applies to the native engine
+        parameters[8].enabled = parameters[7].valueAsText == 'Native'
+            
         #populate value table whenever 'feature field to sum' is selected
         if parameters[1].altered and not parameters[1].hasBeenValidated:
             #convert everything to string
@@ -126,16 +370,19 @@ class CountFeaturesInZone(object):
             featvals = sorted(featvals)
             #name fields for each value as 'Sum_val', validated as field names
             fldnames = [arcpy.ValidateFieldName(('Sum_'+str(x))) for x in featvals]
-            #create list of lists, showing the field values and the output sum field names. This is the GPValueTable
-            #[['val1', 'name1'],['val2', 'name2']]
+            #create list of lists, showing the field values, the output sum field names, and the statistic (count by
+            #default, with no statistic field). This is the GPValueTable
+            #[['val1', 'name1', 'COUNT', ''],['val2', 'name2', 'COUNT', '']]
             valtbl   = []
             for idx, val in enumerate(featvals):
-                valtbl.append([val,fldnames[idx]])
+                valtbl.append([val,fldnames[idx],'COUNT',''])
             
             #define GPValueTable, and filter the first field to only allow field vals
             parameters[4].values = valtbl               
             parameters[4].filters[0].type = 'ValueList'
             parameters[4].filters[0].list = featvals
+            parameters[4].filters[2].type = 'ValueList'
+            parameters[4].filters[2].list = STATISTICS
 
 
     def updateMessages(self, parameters):
@@ -164,10 +411,25 @@ class CountFeaturesInZone(object):
             if len(checknames) != len(set(checknames)):
                 parameters[4].setErrorMessage('Field names must be unique')
                 
+            #statistics other than count need a numeric feature field
+            if parameters[0].value:
+                numeric = [f.name for f in arcpy.ListFields(parameters[0].value) if f.type in ['Integer','SmallInteger','BigInteger','Double','Single']]
+                for val in parameters[4].values:
+                    if len(val) > 3 and val[2] and val[2].upper() != 'COUNT' and val[3] not in numeric:
+                        parameters[4].setErrorMessage("'{}' needs a numeric Statistic Field for {}".format(val[1], val[2]))
+                
         #also warn if new output will overwrite something
         if parameters[6].altered and not parameters[6].hasBeenValidated:
             if arcpy.Exists(parameters[6].valueAsText):
                 parameters[6].setWarningMessage('Existing feature class will be overwritten')
+        
+        if parameters[7].valueAsText == 'Native' and shapely is None:
+            parameters[7].setErrorMessage('The Native engine requires shapely 2.0 or newer')
+        
+        #Summarize Within has no count of non-null values, so means over features with null values would be wrong
+        if parameters[7].valueAsText != 'Native' and parameters[4].values:
+            if any(len(val) > 2 and val[2] and val[2].upper() == 'MEAN' for val in parameters[4].values):
+                parameters[4].setErrorMessage('MEAN statistics need the Native counting engine')
        
         return
         
@@ -190,6 +452,8 @@ class CountFeaturesInZone(object):
         GPValueTable    = parameters[4].values
         MakeNew         = parameters[5].value
         Output          = parameters[6].valueAsText
+        Engine          = parameters[7].valueAsText
+        Tiles           = parameters[8].value
 
         #if they want new output, copy it and redefine vars
         if MakeNew:
@@ -198,12 +462,17 @@ class CountFeaturesInZone(object):
             SumZone = Output
         arcpy.env.addOutputsToMap = False
         
-        #turn GPValueTable into list of field values and field names
+        #turn GPValueTable into list of field values, field names, and (statistic, statistic field)
         fieldvals  = []
         fieldnames = []
+        fieldstats = []
         for idx, val in enumerate(GPValueTable):
             fieldvals.append(val[0])
             fieldnames.append(val[1])
+            #two column tables (from before statistics) are counts
+            stat = val[2].upper() if len(val) > 2 and val[2] else 'COUNT'
+            fieldstats.append((stat, val[3] if stat != 'COUNT' else ''))
+        statfields = sorted({f for st, f in fieldstats if st != 'COUNT'})
 
         #Turn empty strings and None back into those vals
         #using -999 for nulls since pandas doesn't allow null int
@@ -216,65 +485,63 @@ class CountFeaturesInZone(object):
         for idx, val in enumerate(fieldnames):
             d_nameval[val] = fieldvals[idx]
 
-        #create a dictionary to get list of OIDs for each value in SumZoneField
+        #zone value of each OID, in one pass over the zones
         messages.addMessage("Defining zones...")
-        d_zoneOID = {}
-        #different query is Zone field is string or numeric
-        zType = [f.type for f in arcpy.ListFields(SumZone) if f.name == SumZoneField][0]
-        if zType == 'String':
-            for z in set(row[0] for row in arcpy.da.SearchCursor(SumZone, SumZoneField)):
-                d_zoneOID[z] = [row[0] for row in arcpy.da.SearchCursor(SumZone, arcpy.Describe(SumZone).OIDFieldName,where_clause = SumZoneField+" = '"+z+"'")]
-        else:   
-            for z in set(row[0] for row in arcpy.da.SearchCursor(SumZone, SumZoneField)):
-                d_zoneOID[z] = [row[0] for row in arcpy.da.SearchCursor(SumZone, arcpy.Describe(SumZone).OIDFieldName,where_clause = SumZoneField+" = "+str(z))]
+        oid_zone = {oid: z for oid, z in arcpy.da.SearchCursor(SumZone, ['OID@', SumZoneField])}
                 
-        #Use summarize within, with the group field, to create our temp output fc and tbl.
-        messages.addMessage("Summarizing data within zones...")
-        tempfc  = arcpy.CreateUniqueName("sumwithfc", arcpy.env.scratchGDB)
-        temptbl = arcpy.CreateUniqueName("sumwithtbl", arcpy.env.scratchGDB)
-        arcpy.analysis.SummarizeWithin(SumZone, SumFeature, tempfc, "KEEP_ALL", None, "ADD_SHAPE_SUM", '', SumFeatureField, "NO_MIN_MAJ", "NO_PERCENT", temptbl)
-        
-        #convert table to pandas dataframe, must faster to query!
-        #using -999 for nulls since pandas doesn't allow null int
-        messages.addMessage("Creating dataframe...")
-        df = pd.DataFrame(arcpy.da.TableToNumPyArray(temptbl,'*',skip_nulls=False,null_value='-999'))
-        #convert vals to strings since that's what GPValueTable provided
-        df[SumFeatureField] = df[SumFeatureField].astype(str)
+        if Engine == 'Native':
+            #count in process with a spatial index on the zones
+            messages.addMessage("Counting features within zones...")
+            zones, zoneids, feats, feattypes, stats = read_native(SumZone, SumFeature, SumFeatureField, statfields)
+            if Tiles and Tiles > 1:
+                messages.addMessage("Counting {0} x {0} tiles in parallel...".format(Tiles))
+                df = tiled_summary(zones, zoneids, feats, feattypes, SumFeatureField, stats, Tiles)
+            else:
+                df = native_summary(zones, zoneids, feats, feattypes, SumFeatureField, stats)
+        else:
+            #Use summarize within, with the group field, to create our temp output fc and tbl.
+            messages.addMessage("Summarizing data within zones...")
+            tempfc  = arcpy.CreateUniqueName("sumwithfc", arcpy.env.scratchGDB)
+            temptbl = arcpy.CreateUniqueName("sumwithtbl", arcpy.env.scratchGDB)
+            sumfields = [[f, st] for f in statfields for st in ('SUM', 'MIN', 'MAX')] or None
+            arcpy.analysis.SummarizeWithin(SumZone, SumFeature, tempfc, "KEEP_ALL", sumfields, "ADD_SHAPE_SUM", '', SumFeatureField, "NO_MIN_MAJ", "NO_PERCENT", temptbl)
+            
+            #convert table to pandas dataframe, must faster to query!
+            #using -999 for nulls since pandas doesn't allow null int, NaN for the (double) statistic fields so a real
+            #-999 sum/min/max isn't taken as null
+            messages.addMessage("Creating dataframe...")
+            nulls = {f.name: np.nan if f.type in ('Double', 'Single') else '-999' for f in arcpy.ListFields(temptbl)}
+            df = pd.DataFrame(arcpy.da.TableToNumPyArray(temptbl,'*',skip_nulls=False,null_value=nulls))
+            #convert vals to strings since that's what GPValueTable provided
+            df[SumFeatureField] = df[SumFeatureField].astype(str)
+            df = summarize_within_table(df, SumFeatureField, statfields)
+            
+            #and delete SummarizeWithin outputs, since we don't need them anymore
+            messages.addMessage("Deleting intermediate results...")
+            arcpy.management.Delete(tempfc)
+            arcpy.management.Delete(temptbl)
         
-        #and delete SummarizeWithin outputs, since we don't need them anymore
-        messages.addMessage("Deleting intermediate results...")
-        arcpy.management.Delete(tempfc)
-        arcpy.management.Delete(temptbl)
+        #group the summary once, all statistics totalled for each zone value, keyed by OID
+        messages.addMessage("Grouping summary table...")
+        specs  = [(d_nameval[f], st, sf) for f, (st, sf) in zip(fieldnames, fieldstats)]
+        totals = zone_stats(df, SumFeatureField, specs, oid_zone)
         
-        #add fields to SumZone
+        #add fields to SumZone, counts are LONG and other statistics DOUBLE
         messages.addMessage("Adding Fields...")
         fieldnames.append('Feature_Sum')
         arcpy.management.DeleteField(SumZone,fieldnames)
-        for f in fieldnames:
-            arcpy.management.AddField(SumZone, f, 'LONG')
+        for f, (st, sf) in zip(fieldnames, fieldstats + [('COUNT', '')]):
+            arcpy.management.AddField(SumZone, f, 'LONG' if st == 'COUNT' else 'DOUBLE')
         
-        #start populating data. For each zone
+        #start populating data, all zones in one pass
         messages.addMessage("Populating summary fields in output feature class...")
-        for z in d_zoneOID:
-            #define query for just these zones
-            id_list = d_zoneOID[z] 
-            query_oid = arcpy.Describe(SumZone).OIDFieldName+" IN ({:s})".format(','.join(f"{x}" for x in id_list))
-            #and query down the dataframe to just this zone
-            df2 = df[df['Join_ID'].isin(id_list)]
-            #select the rows for just this zone, and the fields we are interested in
-            with arcpy.da.UpdateCursor(SumZone,fieldnames,where_clause=query_oid) as cursor:
-                for row in cursor:
-                    #now loop through the fields and query the vals from the df
-                    for i0 in range(len(d_nameval)):
-                        #get list of JoinID (OID of original zones) and the type / unique val of feature field
-                        type_list = [d_nameval[fieldnames[i0]]]
-                        #query down the dataframe to just those vals
-                        df3 = df2[df2[SumFeatureField].isin(type_list)]
-                        #sum the Count column (last column) in df
-                        row[i0] = sum(df3[df3.columns[-1]])
-                    #feature_sum is just the sum of the other fields
-                    row[len(fieldnames)-1] = sum(row[0:len(fieldnames)-1])
-                    cursor.updateRow(row)
+        iscount = [st == 'COUNT' for st, sf in fieldstats]
+        empty   = [0 if c else None for c in iscount]
+        with arcpy.da.UpdateCursor(SumZone,['OID@']+fieldnames) as cursor:
+            for row in cursor:
+                vals = totals.get(row[0], empty)
+                #feature_sum is just the sum of the count fields
+                cursor.updateRow([row[0]] + vals + [sum(v for v, c in zip(vals, iscount) if c)])
                     
         messages.addMessage("Script Complete!")            
 #End
\ No newline at end of file
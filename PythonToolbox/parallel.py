@@ -0,0 +1,20 @@
+"""
+Shared helpers for the tools that run work in a process pool.
+"""
+
+import os
+import sys
+import multiprocessing
+
+
+def process_pool(processes=None):
+    """multiprocessing.Pool that also starts its workers correctly inside ArcGIS Pro.
+
+    Geoprocessing tools run in ArcGISPro.exe, which is what sys.executable points at there, so multiprocessing would
+    try to start each worker as another copy of Pro. The workers are pointed at pythonw.exe in the same conda
+    environment instead (pythonw so no console windows open). Anywhere else (python.exe, propy, the tests)
+    sys.executable is already a python and is left alone.
+    """
+    if os.path.basename(sys.executable).lower().startswith('arcgispro'):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe'))
+    return multiprocessing.Pool(processes)
@@ -1,13 +1,274 @@
 """
-Takes a raster layer and sets symbology to a user defined min/max stretch
+Takes a raster layer and sets symbology to a user defined min/max stretch, or to a percent clip stretch
+calculated from the raster values.
     
 Version History
     1.0 (03/21/22)      Created       
+    1.1 (10/17/26)      Added Percent Clip mode. Min/max/percentiles are calculated in one streaming pass over the raster
+                        in tiles, using a histogram that can be merged, so rasters larger than memory work.
+    1.2 (10/17/26)      Percent Clip histograms for multiple rasters are calculated in parallel, with the option to merge
+                        them into one common stretch for the whole set.
+    1.3 (10/17/26)      Raster histograms are cached in a local SQLite file keyed by dataset path, size and modified time
+                        (least recently used entries are dropped past the size cap), so restyling the same rasters is instant.
+    1.4 (10/17/26)      Color ramp list is built once per session (and again if the project changes) and filled in when the
+                        dialog is validated, instead of enumerating the project in getParameterInfo. Layers are looked
+                        up by name from one listLayers call.
 
 
 """
 
-import arcpy
+import os
+import time
+import zlib
+import sqlite3
+import tempfile
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+import numpy as np
+from parallel import process_pool
+
+#local cache of raster histograms, and its size cap
+CACHE_PATH   = os.path.join(os.environ.get('LOCALAPPDATA', tempfile.gettempdir()), 'BWPR', 'raster_stats.sqlite')
+CACHE_MAX_MB = 256
+
+#Elev* color ramps for the open project, memoized by color_ramps()
+_ramps = {'key': None, 'ramps': {}}
+
+
+class StretchHistogram(object):
+    """Fixed number of bins, with a range that grows (by doubling the bin width) as new values arrive.
+
+    Tracks the exact min/max and gives percentiles accurate to one bin width. Histograms for different tiles or
+    rasters can be combined with merge(). Works on any NumPy arrays, NaN is ignored.
+    """
+    def __init__(self, nbins=4096):
+        self.nbins  = nbins
+        self.counts = np.zeros(nbins, dtype=np.int64)
+        self.lo     = None
+        self.width  = None
+        self.min    = np.inf
+        self.max    = -np.inf
+        self.n      = 0
+
+    def cover(self, lo, hi):
+        """Grow the range until it covers lo to hi"""
+        if self.lo is None:
+            self.lo = lo
+            self.width = (hi - lo) / self.nbins if hi > lo else max(abs(lo), 1.0) * 1e-6
+            return
+        #a value on the top edge goes in the last bin, so only values past it need a wider range
+        while lo < self.lo or hi > self.lo + self.width * self.nbins:
+            pairs = self.counts.reshape(-1, 2).sum(axis=1)
+            empty = np.zeros(self.nbins // 2, dtype=np.int64)
+            if lo < self.lo:
+                #old range becomes the top half
+                self.lo -= self.width * self.nbins
+                self.counts = np.concatenate([empty, pairs])
+            else:
+                self.counts = np.concatenate([pairs, empty])
+            self.width *= 2
+
+    def bin(self, values):
+        return np.clip(((values - self.lo) / self.width).astype(np.int64), 0, self.nbins - 1)
+
+    def add(self, arr):
+        values = np.asarray(arr, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        vmin, vmax = values.min(), values.max()
+        self.cover(vmin, vmax)
+        self.counts += np.bincount(self.bin(values), minlength=self.nbins)
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+        self.n  += values.size
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        self.cover(other.min, other.max)
+        nz = np.nonzero(other.counts)[0]
+        centers = other.lo + (nz + 0.5) * other.width
+        np.add.at(self.counts, self.bin(centers), other.counts[nz])
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.n  += other.n
+
+    def percentile(self, q):
+        """Value at percentile q (0-100), interpolated within the bin"""
+        if self.n == 0:
+            return None
+        if q <= 0:
+            return float(self.min)
+        if q >= 100:
+            return float(self.max)
+        cum = np.cumsum(self.counts)
+        target = q / 100.0 * self.n
+        i = int(np.searchsorted(cum, target))
+        prev = cum[i-1] if i > 0 else 0
+        value = self.lo + (i + (target - prev) / self.counts[i]) * self.width
+        return float(min(max(value, self.min), self.max))
+
+
+def raster_blocks(path, block=2048):
+    """Yields the first band of a raster one tile at a time as float64 arrays, with NoData as NaN"""
+    ras = arcpy.Raster(path)
+    nodata = ras.noDataValue
+    ext = ras.extent
+    cw, ch = ras.meanCellWidth, ras.meanCellHeight
+    for r0 in range(0, ras.height, block):
+        nrows = min(block, ras.height - r0)
+        for c0 in range(0, ras.width, block):
+            ncols = min(block, ras.width - c0)
+            ll = arcpy.Point(ext.XMin + c0 * cw, ext.YMax - (r0 + nrows) * ch)
+            arr = arcpy.RasterToNumPyArray(ras, ll, ncols, nrows)
+            if arr.ndim == 3:
+                arr = arr[0]
+            arr = arr.astype(np.float64)
+            if nodata is not None:
+                arr[arr == nodata] = np.nan
+            yield arr
+
+
+def raster_histogram(blocks, nbins=4096):
+    """Streaming histogram of an iterable of arrays (tiles from raster_blocks, or synthetic arrays)"""
+    hist = StretchHistogram(nbins)
+    for arr in blocks:
+        hist.add(arr)
+    return hist
+
+
+def color_ramps(p):
+    """{name: ColorRamp} of the elevation color ramps, sorted by number. Only enumerated again when the project
+    (path or saved time) changes."""
+    key = (p.filePath, os.path.getmtime(p.filePath) if os.path.exists(p.filePath) else None)
+    if _ramps['key'] != key:
+        # Get elevation color ramps, sort them
+        ramps = {c.name: c for c in p.listColorRamps('Elev*')}
+        cList = list(ramps)
+        cSort = [i for (v, i) in sorted((v, i) for (i, v) in enumerate([int(x.split("#")[-1]) for x in cList]))]
+        _ramps['ramps'] = {cList[i]: ramps[cList[i]] for i in cSort}
+        _ramps['key'] = key
+    return _ramps['ramps']
+
+
+def layer_index(m):
+    """{name: layer} for every layer in a map, from a single listLayers call (first layer wins, like listLayers(name)[0])"""
+    index = {}
+    for lyr in m.listLayers():
+        index.setdefault(lyr.name, lyr)
+    return index
+
+
+def dataset_signature(path):
+    """(size, mtime) of the files behind a raster dataset, or None if there is nothing on disk to tell when it
+    changed (it isn't cached then). Rasters inside a file geodatabase (which aren't files of their own) use the files
+    in the .gdb folder, so any edit to the geodatabase counts as a change. Lock files are left out, Pro creates and
+    touches them just by opening or drawing the geodatabase. Enterprise geodatabases (below a .sde connection file)
+    and other sources aren't fingerprinted, the connection file doesn't change when the data does."""
+    if not os.path.exists(path):
+        gdb = os.path.dirname(path)
+        while not gdb.lower().endswith('.gdb'):
+            if os.path.dirname(gdb) == gdb or os.path.exists(gdb):
+                return None
+            gdb = os.path.dirname(gdb)
+        if not os.path.isdir(gdb):
+            return None
+        path = gdb
+    if os.path.isdir(path):
+        files = [e.stat() for e in os.scandir(path) if e.is_file() and not e.name.lower().endswith('.lock')]
+        return sum(f.st_size for f in files), max([f.st_mtime for f in files] or [os.path.getmtime(path)])
+    return os.path.getsize(path), os.path.getmtime(path)
+
+
+class StatsCache(object):
+    """SQLite store of raster histograms (and so min/max/percentiles), keyed by path and checked against the
+    dataset's current size and modified time. Least recently used entries are dropped past max_mb."""
+    def __init__(self, path=CACHE_PATH, max_mb=CACHE_MAX_MB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS stats (
+                               path TEXT PRIMARY KEY, size INTEGER, mtime REAL,
+                               nbins INTEGER, lo REAL, width REAL, min REAL, max REAL, n INTEGER,
+                               counts BLOB, accessed REAL)""")
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def get(self, path):
+        """Cached histogram for a raster, or None if it isn't cached or the raster has changed"""
+        sig = dataset_signature(path)
+        row = self.db.execute("SELECT size, mtime, nbins, lo, width, min, max, n, counts FROM stats WHERE path = ?",
+                              (self.key(path),)).fetchone()
+        if row is None or sig is None or tuple(row[:2]) != sig:
+            return None
+        hist = StretchHistogram(row[2])
+        hist.lo, hist.width, hist.min, hist.max, hist.n = row[3:8]
+        hist.counts = np.frombuffer(zlib.decompress(row[8]), dtype=np.int64).copy()
+        with self.db:
+            self.db.execute("UPDATE stats SET accessed = ? WHERE path = ?", (time.time(), self.key(path)))
+        return hist
+
+    def put(self, path, hist):
+        sig = dataset_signature(path)
+        if sig is None or hist.n == 0:
+            return
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO stats VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                            (self.key(path), sig[0], sig[1], hist.nbins, hist.lo, hist.width, float(hist.min),
+                             float(hist.max), int(hist.n), zlib.compress(hist.counts.tobytes()), time.time()))
+        self.evict()
+
+    def evict(self):
+        """Drop the least recently used entries until the cache is under its size cap"""
+        total = 0
+        old = []
+        for path, size in self.db.execute("SELECT path, length(counts) + length(path) + 80 FROM stats ORDER BY accessed DESC"):
+            total += size
+            if total > self.max_bytes:
+                old.append((path,))
+        if old:
+            with self.db:
+                self.db.executemany("DELETE FROM stats WHERE path = ?", old)
+
+    def close(self):
+        self.db.close()
+
+
+def raster_file_histogram(path):
+    """Process pool worker, histogram for one raster dataset"""
+    return raster_histogram(raster_blocks(path))
+
+
+def raster_histograms(paths, cache=None):
+    """Histograms for a list of rasters. Cached ones are read from the cache, the rest are calculated (in a process
+    pool when there is more than one) and saved to the cache."""
+    hists = [cache.get(path) if cache else None for path in paths]
+    todo  = [path for path, hist in zip(paths, hists) if hist is None]
+    if len(todo) == 1:
+        new = [raster_file_histogram(todo[0])]
+    elif todo:
+        with process_pool(min(len(todo), os.cpu_count() or 1)) as pool:
+            new = pool.map(raster_file_histogram, todo)
+    else:
+        new = []
+    new = dict(zip(todo, new))
+    if cache:
+        for path, hist in new.items():
+            cache.put(path, hist)
+    return [hist if hist is not None else new[path] for path, hist in zip(paths, hists)]
+
+
+def merge_histograms(hists):
+    """One histogram covering all the rasters"""
+    total = StretchHistogram(hists[0].nbins)
+    for hist in hists:
+        total.merge(hist)
+    return total
 
 class setRasStretch(object):
 
@@ -50,16 +311,49 @@ class setRasStretch(object):
             datatype="GPString",
             parameterType="Required",
             direction="Input")
-            
-        p = arcpy.mp.ArcGISProject('CURRENT')
-        # Get elevation color ramps, sort them
-        cList = [c.name for c in p.listColorRamps('Elev*')]
-        cSort = [i for (v, i) in sorted((v, i) for (i, v) in enumerate([int(x.split("#")[-1]) for x in cList]))]
-        cList = [cList[i] for i in cSort]
-        cRamp.filter.list = cList
+        #list of color ramps is filled in updateParameters, so opening the tool doesn't need the project
+        cRamp.filter.type = "ValueList"
+        cRamp.filter.list = []
         cRamp.value = 'Elevation #1'
+        
+        stretchMode = arcpy.Parameter(
+            displayName="Stretch values",
+            name="stretchMode",
+            datatype="GPString",
+            parameterType="Required",
+            direction="Input")
+        stretchMode.filter.list = ['Manual', 'Percent Clip']
+        stretchMode.value = 'Manual'
+        
+        lowPct = arcpy.Parameter(
+            displayName="Minimum percent",
+            name="lowPct",
+            datatype="GPDouble",
+            parameterType="Optional",
+            direction="Input")
+        lowPct.filter.type = "Range"
+        lowPct.filter.list = [0, 100]
+        lowPct.value = 2
+        
+        highPct = arcpy.Parameter(
+            displayName="Maximum percent",
+            name="highPct",
+            datatype="GPDouble",
+            parameterType="Optional",
+            direction="Input")
+        highPct.filter.type = "Range"
+        highPct.filter.list = [0, 100]
+        highPct.value = 98
+
+        commonStretch = arcpy.Parameter(
+            displayName="Use one stretch for all rasters",
+            name="commonStretch",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input")
+        commonStretch.value = True
 
-        params = [rasList,minVal,maxVal,cRamp]
+        params = [rasList,minVal,maxVal,cRamp,stretchMode,lowPct,highPct,commonStretch]
         
         return params
 
@@ -71,6 +365,15 @@ class setRasStretch(object):
         """Modify the values and properties of parameters before internal
         validation is performed.  This method is called whenever a parameter
         has been changed."""
+        if not parameters[3].filter.list:
+            parameters[3].filter.list = list(color_ramps(arcpy.mp.ArcGISProject('CURRENT')))
+        #min/max are typed in for Manual, and calculated from the percents for Percent Clip
+        auto = parameters[4].valueAsText == 'Percent Clip'
+        parameters[1].enabled = not auto
+        parameters[2].enabled = not auto
+        parameters[5].enabled = auto
+        parameters[6].enabled = auto
+        parameters[7].enabled = auto
         return
 
     def updateMessages(self, parameters):
@@ -86,23 +389,46 @@ class setRasStretch(object):
         minVal  =  parameters[1].Value
         maxVal  =  parameters[2].Value
         cRamp   =  parameters[3].valueAsText
+        auto    =  parameters[4].valueAsText == 'Percent Clip'
+        lowPct  =  parameters[5].value if parameters[5].value is not None else 2
+        highPct =  parameters[6].value if parameters[6].value is not None else 98
+        common  =  bool(parameters[7].value)
         
         #get current project and map view
         p = arcpy.mp.ArcGISProject('CURRENT')
         m = p.activeMap
         
+        index = layer_index(m)
+        lyrs = [index[ras.name] if ras.name in index else m.listLayers(ras.name)[0] for ras in rasList]
+        cr = color_ramps(p).get(cRamp) or p.listColorRamps(cRamp)[0]
         
+        #calculate the stretch from the raster values, all rasters in parallel, one tile at a time
+        if auto:
+            messages.addMessage('Calculating statistics for {} raster(s)...'.format(len(lyrs)))
+            cache = StatsCache()
+            hists = raster_histograms([lyr.dataSource for lyr in lyrs], cache)
+            cache.close()
+            if common:
+                hists = [merge_histograms(hists)] * len(hists)
+            stretches = []
+            for lyr, hist in zip(lyrs, hists):
+                if hist.n == 0:
+                    messages.addWarningMessage('  {} has no data values, using the typed min/max'.format(lyr.name))
+                    stretches.append((minVal, maxVal))
+                    continue
+                stretches.append((round(hist.percentile(lowPct), 2), round(hist.percentile(highPct), 2)))
+                messages.addMessage('  {}: {}% = {}, {}% = {} (data min {}, max {})'.format(
+                    lyr.name, lowPct, stretches[-1][0], highPct, stretches[-1][1], hist.min, hist.max))
+        else:
+            stretches = [(minVal, maxVal)] * len(lyrs)
 
-        for ras in rasList:
-            messages.addMessage('Updating symbology for raster: {}'.format(ras.name))
-            #get raster layer
-            lyr  = m.listLayers(ras.name)[0]
+        for lyr, (minVal, maxVal) in zip(lyrs, stretches):
+            messages.addMessage('Updating symbology for raster: {}'.format(lyr.name))
 
             #set symbology (color ramp, labels, stretch type)
             sym = lyr.symbology
             sym.updateColorizer('RasterStretchColorizer')
             sym.colorizer.stretchType = 'MinimumMaximum'
-            cr = p.listColorRamps(cRamp)[0]
             sym.colorizer.colorRamp = cr
             sym.colorizer.minLabel = "Min: " + str(minVal)
             sym.colorizer.maxLabel = "Max: " + str(maxVal)
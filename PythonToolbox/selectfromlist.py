@@ -3,11 +3,294 @@ User defines source of list of values (ESRI or Excel).  Selects all features in
     
 Version History
     1.0 (04/14/2022)        Created
+    1.1 (10/17/2026)        Selection strategy based on list size. Small lists use one IN clause, medium lists use chunked
+                            IN clauses, and large lists are matched against the target keys in Python and selected by OID.
+    1.2 (10/17/2026)        Matched OIDs are compressed into BETWEEN ranges (runs of matching features, skipping OIDs that
+                            don't exist) plus short IN lists, and selected in one call.
+    1.3 (10/17/2026)        Validation only reads workbook sheet names and header rows (read-only openpyxl, nrows=0 for
+                            csv), cached by path, modified time and sheet.
+    1.4 (10/17/2026)        Lists are streamed into a set: chunked read_csv for csv, read-only row iteration for xlsx.
+    1.5 (10/17/2026)        Additional list sources (workbooks, csv or tables) are loaded in a thread pool and their keys
+                            unioned, so several lists cost one selection.
 """
 
-import arcpy
+import os
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
 import pandas as pd
 
+#values per IN clause (Oracle's limit, and keeps each clause short enough to parse quickly)
+MAX_IN_VALUES = 1000
+#lists needing more chunks than this are matched in Python instead
+MAX_IN_CHUNKS = 25
+
+#rows per read_csv chunk when loading a csv list
+CSV_CHUNK_ROWS = 100000
+#text read_csv/read_excel treat as missing by default, also skipped when streaming xlsx so every format drops the same values
+NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A',
+             'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+#(kind, path, modified time, sheet) -> sheet names or header row, so validation doesn't keep re-reading the workbook
+_workbook_info = {}
+
+
+def is_csv(path):
+    return os.path.splitext(path)[1].lower() == '.csv'
+
+
+def is_workbook(path):
+    return os.path.splitext(path)[1].lower() in ('.csv', '.xls', '.xlsx', '.xlsm')
+
+
+def is_xlsx(path):
+    return os.path.splitext(path)[1].lower() in ('.xlsx', '.xlsm')
+
+
+def sheet_names(path):
+    """Sheet names of a workbook (none for csv), without reading the sheets"""
+    key = ('sheets', path, os.path.getmtime(path), None)
+    if key not in _workbook_info:
+        if is_csv(path):
+            names = []
+        elif is_xlsx(path):
+            from openpyxl import load_workbook
+            wb = load_workbook(path, read_only=True)
+            names = wb.sheetnames
+            wb.close()
+        else:
+            names = pd.ExcelFile(path).sheet_names
+        _workbook_info[key] = names
+    return _workbook_info[key]
+
+
+def worksheet(wb, sheet):
+    """The named sheet of an openpyxl workbook, or the first sheet if no name is given"""
+    return wb[sheet] if sheet else wb.worksheets[0]
+
+
+def header_names(path, sheet=None):
+    """Column names from the first row of a sheet (the first sheet if none is given, or csv), without reading
+    the data rows"""
+    key = ('header', path, os.path.getmtime(path), sheet)
+    if key not in _workbook_info:
+        if is_csv(path):
+            names = list(pd.read_csv(path, nrows=0).columns)
+        elif is_xlsx(path):
+            from openpyxl import load_workbook
+            wb = load_workbook(path, read_only=True)
+            header = next(worksheet(wb, sheet).iter_rows(max_row=1, values_only=True), ())
+            wb.close()
+            #same names pandas would give the columns
+            names = ['Unnamed: {}'.format(i) if c is None else str(c) for i, c in enumerate(header)]
+        else:
+            names = list(pd.read_excel(path, sheet_name=sheet or 0, nrows=0).columns)
+        _workbook_info[key] = [str(c) for c in names]
+    return _workbook_info[key]
+
+
+def cell_text(v):
+    """Cell value as the string read_excel(dtype=str) would give (whole floats lose the .0)"""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def load_list(path, sheet, field):
+    """Distinct non-empty values of field in a csv/workbook (the first sheet if none is given), read in chunks
+    into a set"""
+    keys = set()
+    if is_csv(path):
+        for chunk in pd.read_csv(path, usecols=[field], dtype=str, chunksize=CSV_CHUNK_ROWS):
+            keys.update(chunk[field].dropna())
+    elif is_xlsx(path):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = worksheet(wb, sheet).iter_rows(values_only=True)
+            header = ['Unnamed: {}'.format(i) if c is None else str(c) for i, c in enumerate(next(rows, ()))]
+            if field not in header:
+                raise ValueError('{} not found in {}'.format(field, sheet))
+            col = header.index(field)
+            for row in rows:
+                v = row[col] if col < len(row) else None
+                if v is not None and not (isinstance(v, str) and v in NA_VALUES):
+                    keys.add(cell_text(v))
+        finally:
+            wb.close()
+    else:
+        #xls has no streaming reader
+        df = pd.read_excel(path, sheet_name=sheet or 0, usecols=[field], dtype=str)
+        keys.update(df[field].dropna())
+    return sorted(keys)
+
+
+def load_table(table, field):
+    """Distinct non-null values of field in an ESRI table or layer"""
+    with arcpy.da.SearchCursor(table, [field]) as cursor:
+        return [v for v in {row[0] for row in cursor} if v is not None]
+
+
+def load_source(source):
+    """Values of a (path, sheet, field) list source, from a workbook/csv or an ESRI table"""
+    path, sheet, field = source
+    if is_workbook(path):
+        return load_list(path, sheet, field)
+    return load_table(path, field)
+
+
+def source_problem(source):
+    """Why a (path, sheet, field) list source can't be read, or None if it can"""
+    path, sheet, field = source
+    if is_workbook(path):
+        if not os.path.exists(path):
+            return "'{}' does not exist".format(path)
+        if sheet and not is_csv(path) and sheet not in sheet_names(path):
+            return "Worksheet '{}' is not in {}".format(sheet, os.path.basename(path))
+        if field not in header_names(path, None if is_csv(path) else sheet):
+            return "List Field '{}' is not in {}".format(field, os.path.basename(path))
+    elif not arcpy.Exists(path):
+        return "'{}' does not exist".format(path)
+    elif field not in [f.name for f in arcpy.ListFields(path)]:
+        return "List Field '{}' is not in {}".format(field, path)
+    return None
+
+
+def union_lists(sources, normalize):
+    """Load the list sources and union their values. Workbooks/csv files are read concurrently in threads (reading
+    is mostly I/O), ESRI tables one after another, since cursors shouldn't be opened from several threads at once.
+    Values are deduplicated on their normalized key, keeping the first form seen, in key order"""
+    files = [source for source in sources if is_workbook(source[0])]
+    lists = {}
+    if files:
+        with ThreadPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as pool:
+            #tables are read here while the files load
+            futures = {source: pool.submit(load_list, *source) for source in files}
+            for source in sources:
+                if source not in futures:
+                    lists[source] = load_table(source[0], source[2])
+            lists.update({source: future.result() for source, future in futures.items()})
+    else:
+        lists = {source: load_table(source[0], source[2]) for source in sources}
+    lists = [lists[source] for source in sources]
+    union = {}
+    for values in lists:
+        for x in values:
+            key = normalize(x)
+            if key is not None and key not in union:
+                union[key] = x
+    return [union[k] for k in sorted(union)]
+
+
+def sql_literals(values, is_string):
+    """Format list values for a where clause, quoting (and escaping) strings"""
+    if is_string:
+        return ["'{}'".format(str(x).replace("'", "''")) for x in values]
+    return [f"{x}" for x in values]
+
+
+def in_clauses(field, literals, size=MAX_IN_VALUES):
+    """Split a list of literals into 'field IN (...)' clauses of at most size values"""
+    return [field+" IN ({:s})".format(','.join(literals[i:i+size])) for i in range(0, len(literals), size)]
+
+
+def select_chunked(layer, sel_type, clauses):
+    """Apply a selection in pieces. A new selection starts with the first clause and adds the rest.
+    Subset can't be split up this way, so it isn't used with subset."""
+    for i, clause in enumerate(clauses):
+        if sel_type == 'NEW_SELECTION' and i > 0:
+            arcpy.management.SelectLayerByAttribute(layer, 'ADD_TO_SELECTION', clause)
+        else:
+            arcpy.management.SelectLayerByAttribute(layer, sel_type, clause)
+
+
+def key_normalizer(is_string):
+    """Function to put list values and target values in the same form before comparing them
+    (list values from Excel are strings, even when the target field is numeric)"""
+    if is_string:
+        return str
+    def number(x):
+        try:
+            return float(x)
+        except (TypeError, ValueError):
+            return None
+    return number
+
+
+def match_oids(table, field, keys, normalize):
+    """Scan the target once. Returns the sorted OIDs whose key is in the set of keys, and all the sorted OIDs"""
+    matched = []
+    alloids = []
+    with arcpy.da.SearchCursor(table, ['OID@', field]) as cursor:
+        for oid, v in cursor:
+            alloids.append(oid)
+            if v is not None and normalize(v) in keys:
+                matched.append(oid)
+    return sorted(matched), sorted(alloids)
+
+
+def oid_ranges(matched, alloids=None):
+    """Compress sorted matched OIDs into [(first, last)] runs.
+
+    With alloids (every OID in the dataset), a run carries on over OIDs that don't exist, so it only breaks at a
+    feature that didn't match. Without it, runs are consecutive numbers only.
+    """
+    runs = []
+    if alloids is None:
+        for oid in matched:
+            if runs and oid == runs[-1][1] + 1:
+                runs[-1][1] = oid
+            else:
+                runs.append([oid, oid])
+    else:
+        matchset = set(matched)
+        inrun = False
+        for oid in alloids:
+            if oid in matchset:
+                if inrun:
+                    runs[-1][1] = oid
+                else:
+                    runs.append([oid, oid])
+                    inrun = True
+            else:
+                inrun = False
+    return [tuple(r) for r in runs]
+
+
+def range_terms(oidField, runs, min_run=3):
+    """Where clause terms for OID runs: 'OID BETWEEN a AND b' for runs of at least min_run features,
+    and IN lists (of up to MAX_IN_VALUES) for the rest"""
+    terms  = []
+    single = []
+    for first, last in runs:
+        if last - first + 1 >= min_run:
+            terms.append('{} BETWEEN {} AND {}'.format(oidField, first, last))
+        else:
+            single.extend(range(first, last + 1))
+    return terms + in_clauses(oidField, sql_literals(single, False))
+
+
+def selected_oids(layer):
+    """OIDs currently selected in a layer (empty set if nothing is selected)"""
+    fids = getattr(arcpy.Describe(layer), 'FIDSet', '') or ''
+    return {int(x) for x in fids.split(';') if x.strip()}
+
+
+def unselected_view(layer, oidField, name='sfl_all'):
+    """Table view of every feature in a layer, keeping its joins and definition query but not its selection.
+    A view made from a layer only holds the selected features, so the selection is cleared while the view is made
+    and then put back by OID."""
+    current = selected_oids(layer)
+    if current:
+        arcpy.management.SelectLayerByAttribute(layer, 'CLEAR_SELECTION')
+    view = arcpy.management.MakeTableView(layer, name)[0]
+    if current:
+        terms = range_terms(oidField, oid_ranges(sorted(current)))
+        select_chunked(layer, 'NEW_SELECTION', [' OR '.join(terms[i:i+MAX_IN_CHUNKS]) for i in range(0, len(terms), MAX_IN_CHUNKS)])
+    return view
+
 class SelectFromList(object):
     def __init__(self):
         """Define the tool (tool name is the name of the class)."""
@@ -87,6 +370,13 @@ class SelectFromList(object):
         list_field.filter.type = "ValueList"
         list_field.filter.list = []
         
+        extra_lists = arcpy.Parameter(
+            displayName="Additional Lists",
+            name="extra_lists",
+            datatype="GPValueTable",
+            parameterType="Optional",
+            direction="Input")
+        extra_lists.columns = [['DEType', 'Workbook, CSV or Table'], ['GPString', 'Worksheet'], ['GPString', 'List Field']]
         
         params.append(in_features)     #0
         params.append(in_field)        #1
@@ -96,6 +386,7 @@ class SelectFromList(object):
         params.append(excelSheet)      #5
         params.append(esriFile)        #6
         params.append(list_field)      #7
+        params.append(extra_lists)     #8
 
 
         return params
@@ -122,13 +413,16 @@ class SelectFromList(object):
 
         if p['list_type'].valueAsText in ['Excel']:
             p['excelFile'].enabled  = True
-            p['excelSheet'].enabled = True
-            #if workbook is define, list the sheets
+            #csv files have no sheets
+            p['excelSheet'].enabled = not (p['excelFile'].value and is_csv(p['excelFile'].valueAsText))
+            #if workbook is define, list the sheets (or the columns for csv). Only the sheet names / header row are read
             if p['excelFile'].altered and not p['excelFile'].hasBeenValidated:
-                p['excelSheet'].filter.list = pd.ExcelFile(p['excelFile'].valueAsText).sheet_names
+                p['excelSheet'].filter.list = sheet_names(p['excelFile'].valueAsText)
+                if is_csv(p['excelFile'].valueAsText):
+                    p['list_field'].filter.list = header_names(p['excelFile'].valueAsText)
                 
-            if p['excelSheet'].altered and not p['excelSheet'].hasBeenValidated:
-                p['list_field'].filter.list = list(pd.read_excel(p['excelFile'].valueAsText, sheet_name=p['excelSheet'].valueAsText).columns)
+            if p['excelSheet'].altered and not p['excelSheet'].hasBeenValidated and p['excelSheet'].value:
+                p['list_field'].filter.list = header_names(p['excelFile'].valueAsText, p['excelSheet'].valueAsText)
                 
                 
         else:
@@ -153,6 +447,15 @@ class SelectFromList(object):
                 p['in_field'].setWarningMessage('Tool not set up to work with dates yet...')
             else:
                 p['in_field'].clearMessage()
+        
+        #check each additional list can be read (sheet and field names aren't known until the file is)
+        if p['extra_lists'].altered and not p['extra_lists'].hasBeenValidated:
+            p['extra_lists'].clearMessage()
+            for src, sheet, field in p['extra_lists'].values or []:
+                problem = source_problem((str(src), sheet or None, field))
+                if problem:
+                    p['extra_lists'].setErrorMessage(problem)
+                    break
         return
 
     def execute(self, parameters, messages):
@@ -168,25 +471,81 @@ class SelectFromList(object):
         excelSheet  = p['excelSheet'].valueAsText
         esriFile    = p['esriFile'].valueAsText
         list_field  = p['list_field'].valueAsText
+        extra_lists = p['extra_lists'].values or []
+        
+        #Define the query based on if in_field is numeric or string
+        in_type =  arcpy.ListFields(in_features,in_field)[0].type
+        is_string = in_type.lower() in ('string','guid','globalid')
         
         #Build the list from the excel/esri src
         stringFlag = 0
         if list_type == 'Excel':
-            df = pd.read_excel(excelFile, sheet_name=excelSheet,usecols = [list_field], dtype=str)
-            sel_list = df[list_field].dropna().unique().tolist()
+            sources = [(excelFile, excelSheet, list_field)]
         else:
-            sel_list = sorted({row[0] for row in arcpy.da.SearchCursor(esriFile, [list_field])},key=lambda x: (x is None, x))
+            sources = [(esriFile, None, list_field)]
+        #additional sources, unioned with the first
+        sources += [(str(src), sheet or None, field) for src, sheet, field in extra_lists]
+        if len(sources) == 1:
+            sel_list = sorted(load_source(sources[0]), key=lambda x: (x is None, x))
+        else:
+            sel_list = union_lists(sources, key_normalizer(is_string))
+            arcpy.AddMessage('Loaded {} values from {} lists'.format(len(sel_list), len(sources)))
 
         
-        #Define the query based on if in_field is numeric or string
-        in_type =  arcpy.ListFields(in_features,in_field)[0].type
-        if in_type.lower() in ('string','guid','globalid'):
-            query = in_field+" IN ({:s})".format(','.join(f"'{x}'" for x in sel_list))
-        else:
-            query = in_field+" IN ({:s})".format(','.join(f"{x}" for x in sel_list))
+        sel_list = [x for x in sel_list if x is not None]
+        if not sel_list:
+            arcpy.AddWarningMessage('List is empty, nothing to select')
+            return
         
-        arcpy.AddMessage('{}'.format(query))
-        #and select by attribute
-        arcpy.management.SelectLayerByAttribute(in_features, sel_type, query)
+        #pick the selection strategy from the size of the list
+        if len(sel_list) <= MAX_IN_VALUES:
+            #one IN clause
+            query = in_clauses(in_field, sql_literals(sel_list, is_string))[0]
+            arcpy.AddMessage('{}'.format(query))
+            arcpy.management.SelectLayerByAttribute(in_features, sel_type, query)
+        elif len(sel_list) <= MAX_IN_VALUES * MAX_IN_CHUNKS and sel_type != 'SUBSET_SELECTION':
+            #chunked IN clauses
+            clauses = in_clauses(in_field, sql_literals(sel_list, is_string))
+            arcpy.AddMessage('Selecting {} values in {} chunks of {}'.format(len(sel_list), len(clauses), MAX_IN_VALUES))
+            select_chunked(in_features, sel_type, clauses)
+        else:
+            #match the keys in Python, then select by OID. Scan the whole dataset (not just the selected features),
+            #the layer's definition query still applies when selecting.
+            normalize = key_normalizer(is_string)
+            keys = {normalize(x) for x in sel_list}
+            desc = arcpy.Describe(in_features)
+            oidField = arcpy.AddFieldDelimiters(in_features, desc.OIDFieldName)
+            source = getattr(desc, 'catalogPath', None) or in_features
+            view = None
+            if not [f for f in arcpy.ListFields(source) if f.name == in_field]:
+                #the field comes from a join, scan the layer itself without its selection
+                source = view = unselected_view(in_features, oidField)
+            try:
+                oids, alloids = match_oids(source, in_field, keys, normalize)
+            finally:
+                if view is not None:
+                    arcpy.management.Delete(view)
+            if not oids:
+                arcpy.AddMessage('Matched {} list values to 0 features'.format(len(sel_list)))
+                if sel_type in ('NEW_SELECTION', 'SUBSET_SELECTION'):
+                    arcpy.management.SelectLayerByAttribute(in_features, 'CLEAR_SELECTION')
+                return
+            #the whole dataset was scanned, so ranges can skip over missing OIDs
+            runs  = oid_ranges(oids, alloids)
+            terms = range_terms(oidField, runs)
+            arcpy.AddMessage('Matched {} list values to {} features in {} OID runs'.format(len(sel_list), len(oids), len(runs)))
+            if len(terms) <= MAX_IN_CHUNKS:
+                #one compact selection
+                arcpy.management.SelectLayerByAttribute(in_features, sel_type, ' OR '.join(terms))
+            else:
+                #too scattered for one clause, select in pieces. Subset is done as a new selection of the matches
+                #that are already selected
+                if sel_type == 'SUBSET_SELECTION':
+                    current = selected_oids(in_features)
+                    if current:
+                        oids = [oid for oid in oids if oid in current]
+                        terms = range_terms(oidField, oid_ranges(oids))
+                    sel_type = 'NEW_SELECTION'
+                select_chunked(in_features, sel_type, [' OR '.join(terms[i:i+MAX_IN_CHUNKS]) for i in range(0, len(terms), MAX_IN_CHUNKS)])
         
         return
\ No newline at end of file
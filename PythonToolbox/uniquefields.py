@@ -1,17 +1,389 @@
 """
-Prints list of unique values for a field.
+Prints list of unique values for one or more fields, or the unique combinations of several fields, optionally with counts.
     
 Version History
     1.0 (12/09/21)       Created
     1.1 (12/14/21)       BS - modified to allow table view inputs, changed in_field to type "field", and added choice between excel or text file
     1.2 (01/07/22)       BS - changed in_field back to string so we can exclude shape/blob types. Check for Max Excel rows.
+    1.3 (10/17/26)       Streaming unique value engine. Values are collected up to a memory budget, then spilled to disk
+                         as sorted runs and merged, so huge high-cardinality fields no longer need the whole set in RAM.
+    1.4 (10/17/26)       Numeric, date and short string fields are read as NumPy arrays and reduced with numpy.unique.
+                         The row by row cursor is only used for other field types.
+    1.5 (10/17/26)       Multiple fields in one cursor pass, either unique values per field or unique combinations across
+                         fields, with optional occurrence counts and sorting by frequency.
+    1.6 (10/17/26)       Approximate mode for huge tables. One streaming pass with fixed memory sketches: HyperLogLog for
+                         the number of distinct values and Space-Saving for the most common values. Can run on a sample.
+    1.7 (10/17/26)       Streaming writers. Excel is written with a write-only openpyxl workbook and rolls over to extra
+                         sheets instead of truncating at the row limit. Added CSV and Parquet (row groups) outputs.
 """
 
 import os
-import arcpy
+import sys
+import csv
+import math
+import heapq
+import pickle
+import tempfile
+from itertools import islice
+from collections import Counter
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+#field types that can be read into a NumPy array and run through numpy.unique
+NUMPY_TYPES = {'SmallInteger': 'i2', 'Integer': 'i4', 'BigInteger': 'i8', 'OID': 'i8',
+               'Single': 'f4', 'Double': 'f8', 'Date': 'datetime64[us]'}
+#Parquet column types for arcpy field types (other field types are written as strings)
+PARQUET_TYPES = {'SmallInteger': 'int16', 'Integer': 'int32', 'BigInteger': 'int64', 'OID': 'int64',
+                 'Single': 'float32', 'Double': 'float64', 'Date': 'timestamp[us]', 'DateOnly': 'date32',
+                 'TimeOnly': 'time64[us]', 'String': 'string', 'GUID': 'string', 'GlobalID': 'string'}
+#strings up to this length are also vectorized
+MAX_NUMPY_STRING = 64
+#data rows per Excel sheet (plus the header row)
+EXCEL_MAX_ROWS = 1048575
+
+
+def sort_key(x):
+    """Sort with nulls last"""
+    return (x is None, x)
+
+
+def combo_key(t):
+    """Sort a combination of field values with nulls last in each position"""
+    return tuple((x is None, x) for x in t)
+
+
+def spill_run(values, batch=10000):
+    """Write a sorted run of items to a temp file in pickled batches. Returns the file, rewound."""
+    f = tempfile.TemporaryFile()
+    for i in range(0, len(values), batch):
+        pickle.dump(values[i:i+batch], f, pickle.HIGHEST_PROTOCOL)
+    f.seek(0)
+    return f
+
+
+def read_run(f):
+    """Stream the items back out of a spilled run"""
+    with f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+
+class ValueCounter(object):
+    """Counts values in a single streaming pass using at most roughly mem_mb of memory.
+
+    Values are added in blocks to a dict of counts. When the estimated size of the dict passes the budget it is
+    sorted and spilled to a temp file, and items() merges all the runs back together (adding up the counts of
+    values found in more than one run), so the output is exactly sorted however many values there are.
+    """
+    def __init__(self, mem_mb=512, key=sort_key):
+        self.budget = mem_mb * 1024 * 1024
+        self.key    = key
+        self.counts = Counter()
+        self.runs   = []
+        self.entry  = 0
+
+    def add(self, block):
+        self.counts.update(block)
+        #rough bytes per entry: the average object size in a sample, plus the dict slot/hash/count overhead
+        sample = block[:100]
+        if sample:
+            self.entry = max(self.entry, sum(map(sys.getsizeof, sample)) // len(sample) + 80)
+        if len(self.counts) * self.entry > self.budget:
+            self.runs.append(spill_run(sorted(self.counts.items(), key=self.itemkey)))
+            self.counts = Counter()
+
+    def itemkey(self, item):
+        return self.key(item[0])
+
+    def items(self):
+        """(value, count) pairs sorted by value"""
+        last = sorted(self.counts.items(), key=self.itemkey)
+        if not self.runs:
+            yield from last
+            return
+        current = None
+        for value, count in heapq.merge(*[read_run(f) for f in self.runs], last, key=self.itemkey):
+            if current is not None and current[0] == value:
+                current[1] += count
+            else:
+                if current is not None:
+                    yield tuple(current)
+                current = [value, count]
+        if current is not None:
+            yield tuple(current)
+
+
+def sorted_stream(items, key, mem_mb=512, chunk=100000):
+    """Sort a stream of items that may not fit in memory (spilling sorted runs past the budget and merging)"""
+    items = iter(items)
+    runs = []
+    held = []
+    entry = 0
+    while True:
+        block = list(islice(items, chunk))
+        if not block:
+            break
+        held.extend(block)
+        entry = max(entry, sys.getsizeof(block[0]) + 100)
+        if len(held) * entry > mem_mb * 1024 * 1024:
+            held.sort(key=key)
+            runs.append(spill_run(held))
+            held = []
+    held.sort(key=key)
+    if not runs:
+        yield from held
+        return
+    yield from heapq.merge(*[read_run(f) for f in runs], held, key=key)
+
+
+def object_array(values):
+    """1D object array of values (tuples stay as single elements)"""
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+class HyperLogLog(object):
+    """Fixed memory distinct count estimate (2**p registers, standard error about 1.04/sqrt(2**p)).
+
+    Uses the pandas 64 bit hash, which is the same in every process, so sketches built on different parts of a
+    table can be combined with merge().
+    """
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add(self, values):
+        h = pd.util.hash_array(object_array(values))
+        idx  = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = h & np.uint64((1 << (64 - self.p)) - 1)
+        #rank = position of the first 1 bit in the remaining bits
+        rank = np.full(rest.shape, 64 - self.p + 1, dtype=np.uint8)
+        nz = rest > 0
+        rank[nz] = (64 - self.p) - np.floor(np.log2(rest[nz].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        est = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            #small range correction (linear counting)
+            est = m * math.log(m / zeros)
+        return int(round(est))
+
+    def error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class SpaceSaving(object):
+    """Fixed memory heavy hitters (most common values).
+
+    Tracks at most `capacity` values. Each block's counts are added, and when there are too many values only the
+    largest counts are kept. Values that show up later start at the largest count that was dropped (the error), so
+    counts are upper bounds and count - error is a lower bound. Sketches can be combined with merge().
+    """
+    def __init__(self, k=100, capacity=None):
+        self.k = k
+        self.capacity = capacity or max(10 * k, 1000)
+        self.counts = {}
+        self.floor = 0
+
+    def add(self, counts):
+        for value, n in counts.items():
+            c = self.counts.get(value)
+            if c:
+                c[0] += n
+            else:
+                self.counts[value] = [self.floor + n, self.floor]
+        if len(self.counts) > self.capacity:
+            self.prune()
+
+    def prune(self):
+        items = sorted(self.counts.items(), key=lambda vc: -vc[1][0])
+        self.floor = max(self.floor, items[self.capacity][1][0])
+        self.counts = dict(items[:self.capacity])
+
+    def merge(self, other):
+        for value in set(self.counts) | set(other.counts):
+            a = self.counts.get(value, [self.floor, self.floor])
+            b = other.counts.get(value, [other.floor, other.floor])
+            self.counts[value] = [a[0] + b[0], a[1] + b[1]]
+        self.floor += other.floor
+        if len(self.counts) > self.capacity:
+            self.prune()
+
+    def top(self):
+        """[(value, count, max error)] for the k most common values"""
+        items = sorted(self.counts.items(), key=lambda vc: -vc[1][0])[:self.k]
+        return [(value, c[0], c[1]) for value, c in items]
+
+
+def write_text(path, outputs, notes, plain):
+    """Write outputs to one text file. plain = single value per line, otherwise tab separated rows"""
+    with open(path, 'w', buffering=1024*1024) as txtfile:
+        for name, cols, rows in outputs:
+            if name in notes:
+                txtfile.write(notes[name] + "\n")
+            elif len(outputs) > 1:
+                txtfile.write(name + "\n")
+            if plain:
+                txtfile.writelines(str(row[0]).strip("()") + "\n" for row in rows)
+            else:
+                txtfile.writelines('\t'.join(str(v) for v in row) + "\n" for row in rows)
+            if len(outputs) > 1:
+                txtfile.write("\n")
+    return [path]
+
+
+def write_excel(path, outputs):
+    """Stream outputs into a write-only workbook, one sheet per output, rolling over to name_2, name_3... sheets
+    when a sheet fills up. Returns [path] and the names of any sheets that were added because of the row limit."""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    extra = []
+    for name, cols, rows in outputs:
+        sheet = None
+        n = 0
+        part = 0
+        for row in rows:
+            if sheet is None or n == EXCEL_MAX_ROWS:
+                part += 1
+                title = name[:31] if part == 1 else '{}_{}'.format(name[:27], part)
+                if part > 1:
+                    extra.append(title)
+                sheet = wb.create_sheet(title)
+                sheet.append(cols)
+                n = 0
+            sheet.append(list(row))
+            n += 1
+        if sheet is None:
+            wb.create_sheet(name[:31]).append(cols)
+    wb.save(path)
+    return [path], extra
+
+
+def output_paths(path, outputs, ext):
+    """One file per output for formats without sheets"""
+    if len(outputs) == 1:
+        return [path + ext]
+    return ['{}_{}{}'.format(path, name, ext) for name, cols, rows in outputs]
+
+
+def write_csv(path, outputs):
+    """Write each output to a buffered CSV file"""
+    paths = output_paths(path, outputs, '.csv')
+    for out, (name, cols, rows) in zip(paths, outputs):
+        with open(out, 'w', newline='', buffering=1024*1024) as f:
+            writer = csv.writer(f)
+            writer.writerow(cols)
+            writer.writerows(rows)
+    return paths
+
+
+def parquet_schema(cols, fieldtypes):
+    """Parquet schema from the arcpy field types ({field name: type}), not from the values, so a column that
+    starts out all null still gets its real type. Columns that aren't fields (the counts) are int64."""
+    import pyarrow as pa
+    types = [PARQUET_TYPES.get(fieldtypes[c], 'string') if c in fieldtypes else 'int64' for c in cols]
+    return pa.schema([(c, pa.type_for_alias(t)) for c, t in zip(cols, types)])
+
+
+def write_parquet(path, outputs, fieldtypes, chunk=100000):
+    """Write each output to a Parquet file, one row group per chunk of rows"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    paths = output_paths(path, outputs, '.parquet')
+    for out, (name, cols, rows) in zip(paths, outputs):
+        schema = parquet_schema(cols, fieldtypes)
+        with pq.ParquetWriter(out, schema) as writer:
+            while True:
+                block = list(islice(rows, chunk))
+                if not block:
+                    break
+                columns = []
+                for c, t in zip(zip(*block), schema.types):
+                    if t == pa.string():
+                        c = [v if v is None or isinstance(v, str) else str(v) for v in c]
+                    columns.append(pa.array(c, type=t))
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+    return paths
+
+
+def numpy_dtype(field):
+    """NumPy dtype to read an arcpy field with, or None if it should use the cursor"""
+    if field.type == 'String' and field.length <= MAX_NUMPY_STRING:
+        return 'U{}'.format(max(field.length, 1))
+    return NUMPY_TYPES.get(field.type)
+
+
+def oid_range(table):
+    """(min, max) OID of the table, streamed through a cursor so no OID array is held"""
+    lo = hi = None
+    with arcpy.da.SearchCursor(table, ['OID@']) as rows:
+        for oid, in rows:
+            if lo is None or oid < lo:
+                lo = oid
+            if hi is None or oid > hi:
+                hi = oid
+    return lo, hi
+
+
+def oid_chunks(lo, hi, size):
+    """(first, last) OID ranges of size OID values from lo to hi. OIDs are unique, so no range has more than size
+    rows, however the OIDs are spread out."""
+    if lo is None:
+        return
+    for first in range(int(lo), int(hi) + 1, size):
+        yield first, min(first + size - 1, hi)
+
+
+def numpy_unique_counts(table, field, dtype, mem_mb=512):
+    """(value, count) pairs for a numeric/date/short string field, using numpy.unique (nulls last, like unique_values).
+
+    If the whole non-null column fits in the memory budget it is read in one TableToNumPyArray call, otherwise it
+    is read in OID value ranges sized to the budget (the OID min/max is found with a cursor, so the OIDs are never all
+    held), each read with TableToNumPyArray, reduced with numpy.unique and merged.
+    Nulls are left out of the array read, and counted by comparing against the row count.
+    """
+    where = '{} IS NOT NULL'.format(arcpy.AddFieldDelimiters(table, field))
+    total = int(arcpy.management.GetCount(table)[0])
+    budget = mem_mb * 1024 * 1024
+    if total * np.dtype(dtype).itemsize <= budget:
+        arr = arcpy.da.TableToNumPyArray(table, [field], where_clause=where)[field]
+        nonnull = arr.size
+        uniq, cnt = np.unique(arr, return_counts=True)
+    else:
+        #half the budget for each chunk, leaving room for the running unique values
+        size = max(int(budget // (2 * np.dtype(dtype).itemsize)), 1)
+        oidField = arcpy.AddFieldDelimiters(table, arcpy.Describe(table).OIDFieldName)
+        nonnull = 0
+        uniq = np.array([], dtype=dtype)
+        cnt  = np.array([], dtype=np.int64)
+        for first, last in oid_chunks(*oid_range(table), size):
+            block = arcpy.da.TableToNumPyArray(table, [field], where_clause='{0} >= {1} AND {0} <= {2} AND {3}'.format(
+                oidField, first, last, where))[field].astype(dtype)
+            nonnull += block.size
+            u, c = np.unique(block, return_counts=True)
+            uniq, inv = np.unique(np.concatenate([uniq, u]), return_inverse=True)
+            cnt = np.bincount(inv.reshape(-1), weights=np.concatenate([cnt, c]), minlength=len(uniq)).astype(np.int64)
+    yield from zip(uniq.astype(dtype).tolist(), cnt.tolist())
+    if nonnull < total:
+        yield (None, total - nonnull)
+
+
 class UniqueFieldValues(object):
     def __init__(self):
         """Define the tool (tool name is the name of the class)."""
@@ -34,28 +406,107 @@ class UniqueFieldValues(object):
        
         #params[1]
         in_field = arcpy.Parameter(
-            displayName = "Select Field",
+            displayName = "Select Field(s)",
             name = "in_field",
             datatype = "GPString",
             parameterType = "Required",
-            direction = "Input")
+            direction = "Input",
+            multiValue = True)
         in_field.filter.type = "ValueList"
         in_field.filter.list = []
         #in_field.parameterDependencies = [in_table.name]
             
         #params[2]
         file_type = arcpy.Parameter(
-            displayName="Open list as Excel or Text?",
+            displayName="Output format",
             name="file_type",
             datatype="GPString",
             parameterType="Required",
             direction="Input")
-        file_type.filter.list = ['Excel', 'Text']
+        file_type.filter.list = ['Excel', 'Text', 'CSV', 'Parquet']
         file_type.value = 'Text'
         
+        #params[3]
+        mem_mb = arcpy.Parameter(
+            displayName="Memory budget (MB)",
+            name="mem_mb",
+            datatype="GPLong",
+            parameterType="Optional",
+            direction="Input",
+            category="Advanced")
+        mem_mb.value = 512
+        
+        #params[4]
+        combine = arcpy.Parameter(
+            displayName="Multiple fields",
+            name="combine",
+            datatype="GPString",
+            parameterType="Required",
+            direction="Input")
+        combine.filter.list = ['Unique values per field', 'Unique combinations of fields']
+        combine.value = 'Unique values per field'
+        
+        #params[5]
+        counts = arcpy.Parameter(
+            displayName="Include counts",
+            name="counts",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input")
+        counts.value = False
+        
+        #params[6]
+        sort_by = arcpy.Parameter(
+            displayName="Sort by",
+            name="sort_by",
+            datatype="GPString",
+            parameterType="Required",
+            direction="Input")
+        sort_by.filter.list = ['Value', 'Frequency']
+        sort_by.value = 'Value'
+        
+        #params[7]
+        approx = arcpy.Parameter(
+            displayName="Approximate (distinct count and most common values only)",
+            name="approx",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input",
+            category="Approximate Mode")
+        approx.value = False
+        
+        #params[8]
+        top_k = arcpy.Parameter(
+            displayName="Number of most common values",
+            name="top_k",
+            datatype="GPLong",
+            parameterType="Optional",
+            direction="Input",
+            category="Approximate Mode")
+        top_k.value = 100
+        
+        #params[9]
+        sample_pct = arcpy.Parameter(
+            displayName="Percent of rows to sample",
+            name="sample_pct",
+            datatype="GPDouble",
+            parameterType="Optional",
+            direction="Input",
+            category="Approximate Mode")
+        sample_pct.filter.type = "Range"
+        sample_pct.filter.list = [0.001, 100]
+        sample_pct.value = 100
+        
         params.append(in_table)
         params.append(in_field)
         params.append(file_type)
+        params.append(mem_mb)
+        params.append(combine)
+        params.append(counts)
+        params.append(sort_by)
+        params.append(approx)
+        params.append(top_k)
+        params.append(sample_pct)
         
         return params
 
@@ -69,6 +520,11 @@ class UniqueFieldValues(object):
         has been changed."""
         if parameters[0].value:
             parameters[1].filter.list = [f.name for f in arcpy.ListFields(parameters[0].value) if f.type not in ['Geometry','Blob']]
+        #only need to choose per field/combinations when there is more than one field
+        parameters[4].enabled = bool(parameters[1].values) and len(parameters[1].values) > 1
+        #counts and sorting don't apply to the approximate output
+        parameters[5].enabled = not parameters[7].value
+        parameters[6].enabled = not parameters[7].value
         return
 
     def updateMessages(self, parameters):
@@ -90,28 +546,100 @@ class UniqueFieldValues(object):
         
         #Get the input data
         in_table =  parameters[0].ValueAsText
-        in_field =  parameters[1].ValueAsText
+        in_fields=  list(parameters[1].values)
         file_type=  parameters[2].ValueAsText
+        mem_mb   =  parameters[3].value or 512
+        combos   =  len(in_fields) > 1 and parameters[4].valueAsText == 'Unique combinations of fields'
+        counts   =  bool(parameters[5].value)
+        sort_by  =  parameters[6].valueAsText
+        approx   =  bool(parameters[7].value)
+        top_k    =  parameters[8].value or 100
+        sample   =  parameters[9].value or 100
+        
+        #Count everything in one cursor pass. Each output is (name, column names, (value, count) pairs sorted by value),
+        #except approximate mode, which gives the finished rows
+        fields = {f.name: f for f in arcpy.ListFields(in_table)}
+        dtype  = numpy_dtype(fields[in_fields[0]])
+        notes  = {}
+        if approx:
+            #one streaming pass into fixed size sketches, optionally on a random sample of rows
+            sketches = [(HyperLogLog(), SpaceSaving(top_k)) for f in ([1] if combos else in_fields)]
+            rng = np.random.default_rng()
+            read = 0
+            with arcpy.da.SearchCursor(in_table, in_fields) as cursor:
+                while True:
+                    block = list(islice(cursor, 100000))
+                    if not block:
+                        break
+                    if sample < 100:
+                        block = [row for row, keep in zip(block, rng.random(len(block)) < sample / 100) if keep]
+                    read += len(block)
+                    for i, (hll, ss) in enumerate(sketches):
+                        vals = block if combos else [row[i] for row in block]
+                        hll.add(vals)
+                        ss.add(Counter(vals))
+            names = ['Combinations'] if combos else in_fields
+            outputs = []
+            for name, (hll, ss) in zip(names, sketches):
+                cols = (in_fields if combos else [name]) + ['Approx Count', 'Max Error']
+                #scale sampled counts up to the whole table
+                scale = 100 / sample
+                rows = [(tuple(v) if combos else (v,)) + (int(round(c * scale)), int(round(e * scale))) for v, c, e in ss.top()]
+                notes[name] = "{}: about {:,} distinct values (+/- {:.1%}) in {:,} rows read{}".format(
+                    name, hll.estimate(), hll.error(), read, ' (sample)' if sample < 100 else '')
+                messages.addMessage(notes[name])
+                outputs.append((name, cols, iter(rows)))
+        elif len(in_fields) == 1 and dtype:
+            #vectorize numeric, date and short string fields
+            outputs = [(in_fields[0], in_fields, numpy_unique_counts(in_table, in_fields[0], dtype, mem_mb))]
+        else:
+            #otherwise fall back to the cursor, sharing the memory budget between the counters
+            if combos:
+                counters = [ValueCounter(mem_mb, combo_key)]
+            else:
+                counters = [ValueCounter(mem_mb / len(in_fields)) for f in in_fields]
+            with arcpy.da.SearchCursor(in_table, in_fields) as cursor:
+                while True:
+                    block = list(islice(cursor, 100000))
+                    if not block:
+                        break
+                    if combos:
+                        counters[0].add(block)
+                    else:
+                        for i, counter in enumerate(counters):
+                            counter.add([row[i] for row in block])
+            if combos:
+                outputs = [('Combinations', in_fields, counters[0].items())]
+            else:
+                outputs = [(f, [f], counters[i].items()) for i, f in enumerate(in_fields)]
         
-        def unique_values(table , field):
-            with arcpy.da.SearchCursor(table, [field]) as cursor:
-                return sorted({row[0] for row in cursor},key=lambda x: (x is None, x))
-                
-        uniquefieldvals = unique_values(in_table,in_field)
+        #sort by frequency (most common first, then by value) if asked, and flatten into rows
+        def output_rows(items, combo):
+            if sort_by == 'Frequency':
+                key = (lambda vc: (-vc[1], combo_key(vc[0]))) if combo else (lambda vc: (-vc[1], sort_key(vc[0])))
+                items = sorted_stream(items, key, mem_mb)
+            for value, count in items:
+                row = tuple(value) if combo else (value,)
+                yield row + (count,) if counts else row
+        if not approx:
+            outputs = [(name, cols + (['Count'] if counts else []), output_rows(items, combos))
+                       for name, cols, items in outputs]
         
-        #save file differently depending on text / excel
+        basename = os.path.join(os.environ.get("TMP"),'UniqueFieldValues_'+'_'.join(in_fields)+'_'+datetime.now().strftime("%Y%m%d%H%M%S"))
+        #every writer streams the rows, nothing builds the full list in memory
         if file_type == 'Text':
-            text = os.path.join(os.environ.get("TMP"),'UniqueFieldValues_'+in_field+'_'+datetime.now().strftime("%Y%m%d%H%M%S")+'.txt')
-            with open(text, 'w') as txtfile:
-                txtfile.writelines(str(i).strip("()") + "\n" for i in uniquefieldvals)
-            os.startfile(text)
+            paths = write_text(basename+'.txt', outputs, notes, plain=not (counts or combos or approx))
+        elif file_type == 'CSV':
+            paths = write_csv(basename, outputs)
+        elif file_type == 'Parquet':
+            paths = write_parquet(basename, outputs, {f: fields[f].type for f in in_fields})
         else:
-            df = pd.DataFrame(uniquefieldvals,columns=[in_field])
-            #check max rows and truncate if necessary
-            if df.shape[0] > 1048575:
-                messages.addWarningMessage("Unique values ({}) exceed the Excel row limit. Only the first 1,048,575 values written to Excel".format(df.shape[0]))
-                df = df.head(1048575)
-            excel = os.path.join(os.environ.get("TMP"),'UniqueFieldValues_'+in_field+'_'+datetime.now().strftime("%Y%m%d%H%M%S")+'.xlsx')
-            df.to_excel(excel, index=False) 
-            os.startfile(excel)
-        return
\ No newline at end of file
+            paths, extra = write_excel(basename+'.xlsx', outputs)
+            if extra:
+                messages.addWarningMessage("Unique values exceed the Excel row limit of 1,048,575 per sheet. Continued on sheet(s): {}".format(', '.join(extra)))
+        for path in paths:
+            messages.addMessage("Output written to {}".format(path))
+            #Parquet has nothing to open it with by default
+            if file_type != 'Parquet':
+                os.startfile(path)
+        return
@@ -0,0 +1,6 @@
+import os
+import sys
+
+#the toolbox modules and the standalone scripts are imported directly, without ArcGIS (arcpy is optional on import)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'PythonToolbox')]
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+shapely = pytest.importorskip('shapely')
+
+from countfeatinply import native_summary, tiled_summary, zone_stats
+
+
+def random_zones_and_features(seed=0, npoints=3000, nlines=200):
+    """Overlapping circular zones, and points/lines (plus a null geometry) with a type and a value that is
+    sometimes null"""
+    rng = np.random.default_rng(seed)
+    zones = list(shapely.buffer(shapely.points(rng.uniform(0, 100, (150, 2))), rng.uniform(2, 15, 150)))
+    zoneids = np.arange(1, len(zones) + 1)
+    points = list(shapely.points(rng.uniform(0, 100, (npoints, 2))))
+    ends = rng.uniform(0, 100, (nlines, 2))
+    lines = list(shapely.linestrings(np.stack([ends, ends + rng.uniform(-15, 15, (nlines, 2))], axis=1)))
+    feats = points + lines + [None]
+    types = rng.choice(['a', 'b', '-999'], len(feats))
+    values = rng.uniform(0, 10, len(feats))
+    values[rng.random(len(feats)) < 0.2] = np.nan
+    return zones, zoneids, feats, types, values
+
+
+def count_by_hand(zones, zoneids, feats, types, values):
+    """{(zone OID, type): [count, sum, n, min, max]} by testing every feature against every zone"""
+    out = {}
+    for z, oid in zip(zones, zoneids):
+        for g, t, v in zip(feats, types, values):
+            if g is None or not z.intersects(g):
+                continue
+            part = z.intersection(g)
+            if shapely.get_dimensions(g) == 1 and part.length == 0:
+                continue
+            row = out.setdefault((oid, t), [0, 0.0, 0, np.inf, -np.inf])
+            row[0] += 1
+            if not np.isnan(v):
+                row[1] += v
+                row[2] += 1
+                row[3] = min(row[3], v)
+                row[4] = max(row[4], v)
+    return out
+
+
+def summary_rows(df):
+    """{(zone OID, type): [count, sum, n, min, max]} from a summary table"""
+    return {(r.Join_ID, r.T): [r.Count, r.SUM_U, r.N_U, r.MIN_U, r.MAX_U] for r in df.itertuples()}
+
+
+def assert_same_summary(got, expected):
+    assert got.keys() == expected.keys()
+    for key, row in expected.items():
+        count, total, n, lo, hi = got[key]
+        assert (count, n) == (row[0], row[2])
+        if n:
+            assert total == pytest.approx(row[1])
+            assert (lo, hi) == (row[3], row[4])
+        else:
+            assert np.isnan([total, lo, hi]).all()
+
+
+def test_native_matches_counting_by_hand():
+    zones, zoneids, feats, types, values = random_zones_and_features()
+    df = native_summary(zones, zoneids, feats, types, 'T', {'U': values})
+    assert_same_summary(summary_rows(df), count_by_hand(zones, zoneids, feats, types, values))
+
+
+@pytest.mark.parametrize('tiles', [1, 3, 6])
+def test_tiled_matches_native(tiles):
+    zones, zoneids, feats, types, values = random_zones_and_features(1)
+    expected = summary_rows(native_summary(zones, zoneids, feats, types, 'T', {'U': values}))
+    got = summary_rows(tiled_summary(zones, zoneids, feats, types, 'T', {'U': values}, tiles=tiles, processes=2))
+    assert_same_summary(got, expected)
+
+
+def test_polygon_touching_zone_is_not_counted():
+    zones = [shapely.box(0, 0, 10, 10), shapely.box(10, 0, 20, 10)]
+    df = native_summary(zones, [1, 2], [shapely.box(2, 2, 10, 8)], ['a'], 'T')
+    assert df[['Join_ID', 'Count']].values.tolist() == [[1, 1]]
+
+
+def test_zone_stats_totals_zones_sharing_a_value():
+    zones, zoneids, feats, types, values = random_zones_and_features(2)
+    df = native_summary(zones, zoneids, feats, types, 'T', {'U': values})
+    #zones in 5 groups, plus a null group
+    oid_zone = {oid: None if oid <= 3 else oid % 5 for oid in zoneids}
+    specs = [('a', 'COUNT', ''), ('b', 'SUM', 'U'), ('a', 'MEAN', 'U'), ('-999', 'MIN', 'U'), ('b', 'MAX', 'U'),
+             ('missing', 'COUNT', ''), ('missing', 'MEAN', 'U')]
+    totals = zone_stats(df, 'T', specs, oid_zone)
+    by_hand = count_by_hand(zones, zoneids, feats, types, values)
+    for oid in zoneids:
+        group = [o for o in zoneids if oid_zone[o] == oid_zone[oid]]
+        rows = {t: [by_hand[(o, t)] for o in group if (o, t) in by_hand] for t in ('a', 'b', '-999')}
+        n_a = sum(r[2] for r in rows['a'])
+        expected = [sum(r[0] for r in rows['a']),
+                    sum(r[1] for r in rows['b']) if any(r[2] for r in rows['b']) else None,
+                    sum(r[1] for r in rows['a']) / n_a if n_a else None,
+                    min((r[3] for r in rows['-999'] if r[2]), default=None),
+                    max((r[4] for r in rows['b'] if r[2]), default=None),
+                    0, None]
+        assert totals[oid] == pytest.approx(expected)
+
+
+def test_all_null_values_give_null_statistics():
+    zones = [shapely.box(0, 0, 10, 10)]
+    points = list(shapely.points([[1, 1], [2, 2]]))
+    df = native_summary(zones, [1], points, ['a', 'a'], 'T', {'U': [np.nan, np.nan]})
+    specs = [('a', 'COUNT', ''), ('a', 'SUM', 'U'), ('a', 'MEAN', 'U'), ('a', 'MIN', 'U'), ('a', 'MAX', 'U')]
+    assert zone_stats(df, 'T', specs, {1: 'z'}) == {1: [2, None, None, None, None]}
+    #the same after merging tiles
+    tiled = tiled_summary(zones, [1], points, ['a', 'a'], 'T', {'U': [np.nan, np.nan]}, tiles=2, processes=1)
+    assert zone_stats(tiled, 'T', specs, {1: 'z'}) == {1: [2, None, None, None, None]}
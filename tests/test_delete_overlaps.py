@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+shapely = pytest.importorskip('shapely')
+
+from DeleteOverlapsByAttribute import (incremental_candidates, overlap_components, overlay_resolve, resolve_component,
+                                       resolve_overlaps)
+
+
+def random_boxes(seed=0, n=120):
+    """n overlapping boxes with OIDs and random ranks"""
+    rng = np.random.default_rng(seed)
+    corners = rng.uniform(0, 100, (n, 2))
+    sizes = rng.uniform(3, 12, n)
+    geoms = [shapely.box(x, y, x + s, y + s * 0.7) for (x, y), s in zip(corners, sizes)]
+    oids = list(range(1, n + 1))
+    return oids, dict(zip(oids, rng.integers(0, 20, n).tolist())), geoms
+
+
+def random_rings(seed=0, n=60):
+    """n overlapping buffered points with holes, and random ranks"""
+    rng = np.random.default_rng(seed)
+    centers = shapely.points(rng.uniform(0, 100, (n, 2)))
+    radii = rng.uniform(4, 12, n)
+    geoms = list(shapely.difference(shapely.buffer(centers, radii), shapely.buffer(centers, radii / 3)))
+    oids = list(range(1, n + 1))
+    return oids, dict(zip(oids, rng.integers(0, 20, n).tolist())), geoms
+
+
+def overlap_pairs(oids, geoms):
+    """{pair number: [OID, OID]} for every pair sharing area, standing in for the Count Overlapping table"""
+    groups = {}
+    for i in range(len(geoms)):
+        for j in range(i + 1, len(geoms)):
+            if geoms[i].intersection(geoms[j]).area > 0:
+                groups[len(groups) + 1] = [oids[i], oids[j]]
+    return groups
+
+
+def clip_by_hand(oids, ranks, geoms, descending=False):
+    """Each polygon minus every polygon that overlaps it and beats it (rank, then OID)"""
+    key = lambda oid: (ranks[oid], oid)
+    result = {}
+    for oid, g in zip(oids, geoms):
+        beats = [h for other, h in zip(oids, geoms) if other != oid and g.intersection(h).area > 0
+                 and (key(other) > key(oid) if descending else key(other) < key(oid))]
+        if beats:
+            result[oid] = g.difference(shapely.union_all(beats))
+    return result
+
+
+def assert_same_shapes(got, expected, tol=1e-6):
+    assert set(got) == set(expected)
+    for oid, g in expected.items():
+        assert shapely.symmetric_difference(got[oid], g).area < tol
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_bulk_matches_clipping_by_hand(descending):
+    oids, ranks, geoms = random_boxes()
+    got = resolve_overlaps(overlap_pairs(oids, geoms), ranks, dict(zip(oids, geoms)), descending)
+    assert_same_shapes(got, clip_by_hand(oids, ranks, geoms, descending))
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_overlay_matches_clipping_by_hand(descending):
+    oids, ranks, geoms = random_boxes(1)
+    expected = clip_by_hand(oids, ranks, geoms, descending)
+    got = overlay_resolve(oids, ranks, geoms, descending)
+    #the overlay only returns polygons that lost area
+    areas = dict(zip(oids, shapely.area(geoms)))
+    assert_same_shapes(got, {oid: g for oid, g in expected.items() if g.area < areas[oid] - 1e-9})
+
+
+def test_parallel_clusters_match_bulk():
+    oids, ranks, geoms = random_boxes(2)
+    shapes = dict(zip(oids, geoms))
+    groups = overlap_pairs(oids, geoms)
+    got = {}
+    for cluster in overlap_components(groups):
+        wkbs = {oid: shapely.to_wkb(shapes[oid]) for pair in cluster.values() for oid in pair}
+        clipped, before, after = resolve_component((cluster, ranks, wkbs, False, None, 0))
+        got.update({oid: shapely.from_wkb(wkb) for oid, wkb in clipped.items()})
+    assert_same_shapes(got, resolve_overlaps(groups, ranks, shapes))
+
+
+def test_incremental_candidates_cover_changed_neighbours():
+    saved = {1: ('a', 0, 0, 10, 10), 2: ('b', 10, 0, 20, 10), 3: ('c', 50, 50, 60, 60), 4: ('d', 30, 0, 40, 10)}
+    current = dict(saved)
+    #1 changed, 4 deleted, 5 is new and touches 3
+    current[1] = ('a2', 0, 0, 10, 10)
+    del current[4]
+    current[5] = ('e', 60, 55, 70, 65)
+    assert incremental_candidates(saved, current) == {1, 2, 3, 5}
+
+
+@pytest.mark.parametrize('gridSize', [0.01, 0.5])
+def test_precision_mode_leaves_no_overlaps(gridSize):
+    oids, ranks, geoms = random_rings()
+    shapes = dict(zip(oids, geoms))
+    for resolved in (resolve_overlaps(overlap_pairs(oids, geoms), ranks, shapes, gridSize=gridSize),
+                     overlay_resolve(oids, ranks, geoms, gridSize=gridSize)):
+        result = [resolved.get(oid, shapely.set_precision(shapes[oid], gridSize)) for oid in oids]
+        left, right = shapely.STRtree(result).query(result, predicate='intersects')
+        keep = left < right
+        overlaps = shapely.area(shapely.intersection(np.take(result, left[keep]), np.take(result, right[keep])))
+        assert (overlaps > 1e-9).sum() == 0
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from rasterminmax import StretchHistogram, dataset_signature, merge_histograms
+
+
+def synthetic_dem(seed=0, shape=(400, 500)):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:shape[0], 0:shape[1]]
+    dem = 200 + 80 * np.sin(x / 60) * np.cos(y / 45) + rng.normal(0, 5, shape)
+    dem[rng.random(shape) < 0.01] = np.nan
+    return dem
+
+
+def tiles(arr, size=100):
+    for i in range(0, arr.shape[0], size):
+        for j in range(0, arr.shape[1], size):
+            yield arr[i:i+size, j:j+size]
+
+
+@pytest.mark.parametrize('q', [0.5, 2, 25, 50, 75, 98, 99.5])
+def test_tiled_percentiles_match_numpy(q):
+    dem = synthetic_dem()
+    hist = StretchHistogram()
+    for tile in tiles(dem):
+        hist.add(tile)
+    assert hist.min == np.nanmin(dem)
+    assert hist.max == np.nanmax(dem)
+    assert hist.n == np.isfinite(dem).sum()
+    assert abs(hist.percentile(q) - np.nanpercentile(dem, q)) <= hist.width
+
+
+def test_same_range_does_not_widen_bins():
+    dem = synthetic_dem()
+    first = StretchHistogram()
+    first.add(dem)
+    width = first.width
+    #a tile with the same maximum as the first one
+    first.add(dem[:50])
+    first.add(np.array([np.nanmax(dem)]))
+    assert first.width == width
+
+
+def test_merged_histograms_match_numpy():
+    dems = [synthetic_dem(seed) for seed in range(3)]
+    hists = []
+    for dem in dems:
+        hist = StretchHistogram()
+        for tile in tiles(dem):
+            hist.add(tile)
+        hists.append(hist)
+    merged = merge_histograms(hists)
+    values = np.concatenate([dem.ravel() for dem in dems])
+    assert merged.n == np.isfinite(values).sum()
+    for q in (2, 50, 98):
+        assert abs(merged.percentile(q) - np.nanpercentile(values, q)) <= 2 * merged.width
+
+
+def test_signature_only_for_files_and_file_gdbs(tmp_path):
+    tif = tmp_path / 'dem.tif'
+    tif.write_bytes(b'x' * 10)
+    assert dataset_signature(str(tif))[0] == 10
+    gdb = tmp_path / 'data.gdb'
+    gdb.mkdir()
+    (gdb / 'a00000009.gdbtable').write_bytes(b'x' * 5)
+    signature = dataset_signature(str(gdb / 'dem'))
+    assert dataset_signature(str(gdb / 'fds' / 'dem')) == signature
+    #opening the gdb in Pro only touches lock files
+    (gdb / 'dem.1234.sr.lock').write_bytes(b'x' * 3)
+    assert dataset_signature(str(gdb / 'dem')) == signature
+    #enterprise geodatabase: the connection file never changes with the data
+    sde = tmp_path / 'conn.sde'
+    sde.write_bytes(b'x')
+    assert dataset_signature(str(sde / 'owner.DEM')) is None
+    assert dataset_signature(str(tmp_path / 'missing' / 'dem')) is None
@@ -0,0 +1,92 @@
+import pytest
+
+import selectfromlist
+from selectfromlist import MAX_IN_VALUES, key_normalizer, oid_ranges, range_terms
+
+
+def test_oid_ranges_consecutive_only():
+    assert oid_ranges([1, 2, 3, 5, 7, 8]) == [(1, 3), (5, 5), (7, 8)]
+    assert oid_ranges([]) == []
+
+
+def test_oid_ranges_skip_missing_oids():
+    #4 and 6 don't exist, 9 exists but didn't match
+    alloids = [1, 2, 3, 5, 7, 8, 9, 10]
+    assert oid_ranges([1, 2, 3, 5, 7, 8, 10], alloids) == [(1, 8), (10, 10)]
+
+
+def test_range_terms():
+    terms = range_terms('OBJECTID', [(1, 5), (8, 9), (12, 12)])
+    assert terms == ['OBJECTID BETWEEN 1 AND 5', 'OBJECTID IN (8,9,12)']
+
+
+def test_range_terms_splits_long_in_lists():
+    runs = [(i, i) for i in range(0, 4 * MAX_IN_VALUES, 2)]
+    terms = range_terms('OID', runs)
+    assert len(terms) == 2
+    assert all(t.startswith('OID IN (') for t in terms)
+
+
+@pytest.mark.parametrize('is_string, values, same', [
+    (False, ['12', 12, 12.0, ' 12 '], True),
+    (False, ['12', '12.5'], False),
+    (True, ['12', 'A'], False),
+])
+def test_key_normalizer(is_string, values, same):
+    normalize = key_normalizer(is_string)
+    assert (len({normalize(v) for v in values}) == 1) == same
+
+
+def test_key_normalizer_bad_numbers():
+    assert key_normalizer(False)('abc') is None
+    assert key_normalizer(False)(None) is None
+
+
+class FakeLayer(object):
+    """Just enough of arcpy to check that unselected_view makes its view without the layer's selection"""
+    def __init__(self, selected):
+        self.selected = set(selected)
+        self.views = []
+        self.management = self
+
+    def Describe(self, layer):
+        return type('Describe', (), {'FIDSet': ';'.join(map(str, sorted(self.selected)))})
+
+    def SelectLayerByAttribute(self, layer, sel_type, where=''):
+        if sel_type == 'CLEAR_SELECTION':
+            self.selected = set()
+            return
+        oids = set()
+        for term in where.split(' OR '):
+            if ' BETWEEN ' in term:
+                first, last = map(int, term.split(' BETWEEN ')[1].split(' AND '))
+                oids |= set(range(first, last + 1))
+            else:
+                oids |= {int(x) for x in term.split('(')[1].rstrip(')').split(',')}
+        self.selected = oids if sel_type == 'NEW_SELECTION' else self.selected | oids
+
+    def MakeTableView(self, layer, name):
+        self.views.append(set(self.selected))
+        return [name]
+
+
+def test_unselected_view_restores_selection(monkeypatch):
+    selected = {1, 2, 3, 4, 10, 20}
+    fake = FakeLayer(selected)
+    monkeypatch.setattr(selectfromlist, 'arcpy', fake)
+    assert selectfromlist.unselected_view('layer', 'OID') == 'sfl_all'
+    assert fake.views == [set()]
+    assert fake.selected == selected
+
+
+def test_load_list_drops_the_same_na_values_in_every_format(tmp_path):
+    pytest.importorskip('openpyxl')
+    import pandas as pd
+    values = ['A1', 'NA', 'N/A', 'null', '#N/A', '', None, 'B2', 'A1', 7]
+    df = pd.DataFrame({'KEY': values}, dtype=object)
+    csv = str(tmp_path / 'list.csv')
+    xlsx = str(tmp_path / 'list.xlsx')
+    df.to_csv(csv, index=False)
+    df.to_excel(xlsx, index=False)
+    assert selectfromlist.load_list(csv, None, 'KEY') == ['7', 'A1', 'B2']
+    assert selectfromlist.load_list(xlsx, None, 'KEY') == ['7', 'A1', 'B2']
@@ -0,0 +1,125 @@
+import re
+import random
+import contextlib
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import uniquefields
+from uniquefields import HyperLogLog, SpaceSaving, ValueCounter, sort_key, sorted_stream
+
+
+def random_values(n=20000, distinct=3000, seed=0):
+    rng = random.Random(seed)
+    return [None if rng.random() < 0.02 else 'v{:05d}'.format(rng.randrange(distinct)) for _ in range(n)]
+
+
+def test_value_counter_spills_and_merges():
+    values = random_values()
+    counter = ValueCounter(mem_mb=0.02)
+    for i in range(0, len(values), 1000):
+        counter.add(values[i:i+1000])
+    assert counter.runs
+    expected = sorted(Counter(values).items(), key=lambda vc: sort_key(vc[0]))
+    assert list(counter.items()) == expected
+
+
+def test_sorted_stream_spills_and_merges():
+    values = random_values()
+    out = list(sorted_stream(iter(values), key=sort_key, mem_mb=0.05, chunk=500))
+    assert out == sorted(values, key=sort_key)
+
+
+class FakeTable(object):
+    """Just enough of arcpy for numpy_unique_counts on an in-memory {oid: value} table"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+        self.da = self
+        self.management = self
+
+    def AddFieldDelimiters(self, table, field):
+        return field
+
+    def Describe(self, table):
+        return type('Describe', (), {'OIDFieldName': 'OID'})
+
+    def GetCount(self, table):
+        return [str(len(self.rows))]
+
+    def SearchCursor(self, table, fields):
+        assert fields == ['OID@']
+        return contextlib.nullcontext([(oid,) for oid in self.rows])
+
+    def TableToNumPyArray(self, table, fields, where_clause=None):
+        self.calls.append(fields)
+        assert fields == ['VALUE']
+        m = re.match(r'OID >= (\d+) AND OID <= (\d+) AND ', where_clause or '')
+        lo, hi = (int(m.group(1)), int(m.group(2))) if m else (-1, float('inf'))
+        values = [v for oid, v in self.rows.items() if lo <= oid <= hi and v is not None]
+        return np.array(values, dtype=[('VALUE', 'i4')])
+
+
+def test_numpy_unique_counts_chunks_on_oid_ranges(monkeypatch):
+    rng = random.Random(1)
+    #sparse OIDs, as after deletes
+    rows = {oid: (None if rng.random() < 0.05 else rng.randrange(50)) for oid in rng.sample(range(1, 200000), 5000)}
+    fake = FakeTable(rows)
+    monkeypatch.setattr(uniquefields, 'arcpy', fake)
+    out = list(uniquefields.numpy_unique_counts('t', 'VALUE', 'i4', mem_mb=0.01))
+    assert len(fake.calls) > 1
+    assert out == sorted(Counter(rows.values()).items(), key=lambda vc: sort_key(vc[0]))
+
+
+def test_hyperloglog_merged_estimate():
+    values = ['v{}'.format(i) for i in range(50000)]
+    first, second = HyperLogLog(), HyperLogLog()
+    first.add(values[:30000])
+    #overlapping halves, as from two workers
+    second.add(values[20000:])
+    first.merge(second)
+    assert abs(first.estimate() - len(values)) <= 4 * first.error() * len(values)
+
+
+def test_space_saving_finds_heavy_hitters():
+    rng = random.Random(2)
+    heavy = ['h{}'.format(i) for i in range(5)]
+    values = [rng.choice(heavy) if rng.random() < 0.3 else 'x{}'.format(rng.randrange(100000)) for _ in range(60000)]
+    first, second = SpaceSaving(k=5, capacity=200), SpaceSaving(k=5, capacity=200)
+    first.add(Counter(values[:30000]))
+    second.add(Counter(values[30000:]))
+    first.merge(second)
+    true = Counter(values)
+    top = first.top()
+    assert {value for value, count, error in top} == set(heavy)
+    for value, count, error in top:
+        assert count - error <= true[value] <= count
+
+
+def test_excel_rolls_over_to_new_sheets(tmp_path, monkeypatch):
+    openpyxl = pytest.importorskip('openpyxl')
+    monkeypatch.setattr(uniquefields, 'EXCEL_MAX_ROWS', 4)
+    rows = [('v{}'.format(i), i) for i in range(10)]
+    path = str(tmp_path / 'out.xlsx')
+    paths, extra = uniquefields.write_excel(path, [('NAME', ['NAME', 'Count'], iter(rows))])
+    assert paths == [path] and extra == ['NAME_2', 'NAME_3']
+    wb = openpyxl.load_workbook(path, read_only=True)
+    assert wb.sheetnames == ['NAME', 'NAME_2', 'NAME_3']
+    read = []
+    for ws in wb.worksheets:
+        values = list(ws.values)
+        assert values[0] == ('NAME', 'Count')
+        read.extend(values[1:])
+    assert read == rows
+
+
+def test_parquet_keeps_types_of_all_null_first_chunk(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    rows = [(None, 3), (None, 1)] + [(float(i), 1) for i in range(5)]
+    paths = uniquefields.write_parquet(str(tmp_path / 'out'), [('X', ['X', 'Count'], iter(rows))], {'X': 'Double'},
+                                       chunk=2)
+    table = pq.read_table(paths[0])
+    assert str(table.schema.field('X').type) == 'double'
+    assert str(table.schema.field('Count').type) == 'int64'
+    assert list(zip(table['X'].to_pylist(), table['Count'].to_pylist())) == rows